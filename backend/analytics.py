@@ -0,0 +1,228 @@
+"""
+View and click analytics, aggregated in memory.
+Tracker.track() only bumps a counter and a HyperLogLog sketch for the
+(kind, item, UTC day) key. A background task flushes what accumulated since
+the last flush as one unordered bulk_write of upserts that $inc the counters
+and $max the sketch registers, so every worker merges into the same daily
+documents without reading them first. Unique visitors are estimated from the
+merged registers (about 3% error at the default precision).
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_COLLECTION = "analytics"
+
+# Tracked kinds and the collection their ids belong to
+KINDS = {"project": "projects", "photo": "photography"}
+EVENTS = ("view", "click")
+
+DAY_SECONDS = 86400
+
+
+def day_name(day: int) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(day * DAY_SECONDS))
+
+
+class HyperLogLog:
+    """Cardinality sketch with 2**precision one-byte registers"""
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = 10):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str) -> None:
+        hashed = int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+        bits = 64 - self.precision
+        index = hashed >> bits
+        rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        for index, rank in enumerate(other.registers):
+            if rank > self.registers[index]:
+                self.registers[index] = rank
+
+    def merge_registers(self, registers: Dict[str, int]) -> None:
+        """Merge the sparse {index: rank} form stored in Mongo"""
+        for index, rank in registers.items():
+            index = int(index)
+            if rank > self.registers[index]:
+                self.registers[index] = rank
+
+    def sparse(self) -> Dict[str, int]:
+        return {str(index): rank for index, rank in enumerate(self.registers) if rank}
+
+    def count(self) -> int:
+        m = len(self.registers)
+        estimate = (0.7213 / (1 + 1.079 / m)) * m * m / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate while most registers are empty
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+
+class _Counts:
+    __slots__ = ("view", "click", "visitors")
+
+    def __init__(self, precision: int):
+        self.view = 0
+        self.click = 0
+        self.visitors = HyperLogLog(precision)
+
+    def merge(self, other: "_Counts") -> None:
+        self.view += other.view
+        self.click += other.click
+        self.visitors.merge(other.visitors)
+
+
+class Tracker:
+    def __init__(
+        self,
+        database,
+        flush_interval: float = 10.0,
+        precision: int = 10,
+        max_keys: int = 10000,
+        on_flush=None,
+    ):
+        self.database = database
+        self.flush_interval = flush_interval
+        self.precision = precision
+        self.max_keys = max_keys
+        self.on_flush = on_flush
+        self._pending: Dict[tuple, _Counts] = {}
+        self._items: Dict[str, frozenset] = {}
+        self._worker: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self.tracked = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+
+    def set_items(self, kind: str, item_ids: Iterable[str]) -> None:
+        """Ids that may be tracked for a kind, so unknown ids cannot grow the buffer"""
+        self._items[kind] = frozenset(item_ids)
+
+    def known(self, kind: str, item_id: str) -> bool:
+        return item_id in self._items.get(kind, ())
+
+    def track(self, kind: str, item_id: str, event: str, visitor: str, now: Optional[float] = None) -> bool:
+        """Count one event; returns False when the buffer is full and the event was dropped"""
+        key = (kind, item_id, int((time.time() if now is None else now) // DAY_SECONDS))
+        counts = self._pending.get(key)
+        if counts is None:
+            if len(self._pending) >= self.max_keys:
+                self.dropped += 1
+                return False
+            counts = self._pending[key] = _Counts(self.precision)
+        if event == "click":
+            counts.click += 1
+        else:
+            counts.view += 1
+        counts.visitors.add(visitor)
+        self.tracked += 1
+        return True
+
+    def start(self) -> None:
+        self._stopping = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush what is still buffered, then stop the worker"""
+        if self._worker is None:
+            return
+        self._stopping.set()
+        await self._worker
+        self._worker = None
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write the buffered counts; returns the number of documents upserted"""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        operations = [
+            UpdateOne(
+                {"_id": f"{kind}:{item_id}:{day_name(day)}"},
+                {
+                    "$setOnInsert": {"kind": kind, "itemId": item_id, "day": day_name(day)},
+                    "$inc": {"views": counts.view, "clicks": counts.click},
+                    "$max": {f"visitors.{index}": rank for index, rank in counts.visitors.sparse().items()},
+                },
+                upsert=True,
+            )
+            for (kind, item_id, day), counts in pending.items()
+        ]
+        try:
+            await self.database[ANALYTICS_COLLECTION].bulk_write(operations, ordered=False)
+        except Exception as e:
+            # Keep the counts for the next flush; a retried $inc may double count
+            # documents that were written before the error
+            self.failed_flushes += 1
+            logger.error(f"Error flushing analytics: {e}")
+            for key, counts in pending.items():
+                current = self._pending.get(key)
+                if current is None:
+                    self._pending[key] = counts
+                else:
+                    current.merge(counts)
+            return 0
+        self.flushes += 1
+        if self.on_flush is not None:
+            self.on_flush()
+        return len(operations)
+
+    async def item_stats(self, kind: str, days: int = 30, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Flushed views, clicks and unique visitors per item over the last `days` days, most viewed first"""
+        today = int((time.time() if now is None else now) // DAY_SECONDS)
+        documents = await self.database[ANALYTICS_COLLECTION].find(
+            {"kind": kind, "day": {"$gte": day_name(today - days + 1)}},
+            {"_id": 0, "itemId": 1, "views": 1, "clicks": 1, "visitors": 1},
+        ).to_list(None)
+
+        totals: Dict[str, _Counts] = {}
+        for document in documents:
+            counts = totals.get(document["itemId"])
+            if counts is None:
+                counts = totals[document["itemId"]] = _Counts(self.precision)
+            counts.view += document.get("views", 0)
+            counts.click += document.get("clicks", 0)
+            counts.visitors.merge_registers(document.get("visitors", {}))
+
+        ranking = [
+            {"id": item_id, "views": counts.view, "clicks": counts.click, "visitors": counts.visitors.count()}
+            for item_id, counts in totals.items()
+        ]
+        ranking.sort(key=lambda entry: (-entry["views"], -entry["clicks"], entry["id"]))
+        return ranking
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pendingKeys": len(self._pending),
+            "tracked": self.tracked,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "failedFlushes": self.failed_flushes,
+        }
@@ -0,0 +1,160 @@
+"""
+In-process read-through cache for the portfolio API.
+Entries expire after a TTL, the cache is bounded with LRU eviction, and every
+entry is tagged with the collections it was built from so writes can drop
+exactly the entries they affect. Concurrent misses on the same key share one
+in-flight load (single-flight), so an expiry or a deploy does not send a
+thundering herd of identical queries to Mongo. Invalidation detaches the
+loads in flight for the affected tags, so a read that starts after a write
+never joins a load that started before it.
+"""
+
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+_MISSING = object()
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.coalesced = 0
+        # key -> (load task, tags)
+        self._inflight: Dict[Hashable, Tuple[asyncio.Task, tuple]] = {}
+        # Bumped by every invalidation, so a load that raced a write is not stored
+        self._generation = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a fresh cached value or default, counting the hit or miss"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, tags, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self._discard(key)
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[str] = ()) -> None:
+        """Store a value under key, tagged with the collections it depends on"""
+        if self.max_entries <= 0:
+            return
+        if key in self._entries:
+            self._discard(key)
+        tags = tuple(tags)
+        self._entries[key] = (time.monotonic() + self.ttl, tags, value)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self.evictions += 1
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """Read-through lookup: serve from cache, join a load in flight, or start one"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            tags = tuple(tags)
+            task = asyncio.ensure_future(self._load(key, loader, tags))
+            self._inflight[key] = (task, tags)
+            task.add_done_callback(functools.partial(self._load_finished, key))
+        else:
+            task = inflight[0]
+            self.coalesced += 1
+        # Shielded so a disconnecting client does not cancel the load for everyone else
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], tags: tuple) -> Any:
+        generation = self._generation
+        value = await loader()
+        if generation == self._generation:
+            self.set(key, value, tags)
+        return value
+
+    def _load_finished(self, key: Hashable, task: asyncio.Task) -> None:
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight[0] is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the error retrieved even if every waiter went away
+            task.exception()
+
+    def cached(self, *tags: str):
+        """Decorator making an async reader read-through, keyed on its name and arguments"""
+        def decorator(reader):
+            @functools.wraps(reader)
+            async def wrapper(*args, **kwargs):
+                key = (reader.__name__, args, tuple(sorted(kwargs.items())))
+                return await self.get_or_load(key, lambda: reader(*args, **kwargs), tags)
+            return wrapper
+        return decorator
+
+    def invalidate(self, *tags: str) -> int:
+        """Drop every entry tagged with any of the given collections"""
+        self._generation += 1
+        # Loads already running may have read the old data; later reads start their own
+        for key, (_, load_tags) in list(self._inflight.items()):
+            if any(tag in tags for tag in load_tags):
+                del self._inflight[key]
+        dropped = 0
+        for tag in tags:
+            for key in list(self._tags.pop(tag, ())):
+                if key in self._entries:
+                    self._discard(key)
+                    dropped += 1
+        self.invalidations += dropped
+        return dropped
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._inflight.clear()
+        self._entries.clear()
+        self._tags.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "coalesced": self.coalesced,
+            "inFlight": len(self._inflight),
+        }
+
+    def _discard(self, key: Hashable) -> Optional[tuple]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            for tag in entry[1]:
+                keys = self._tags.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._tags[tag]
+        return entry
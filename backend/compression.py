@@ -0,0 +1,180 @@
+"""
+gzip / brotli content negotiation.
+Snapshots precompress their body once when they are built, in a worker
+thread: at maximum quality for the canonical routes and at fast settings for
+ad-hoc keys (field selections, pages) that clients can vary freely;
+CompressionMiddleware compresses everything else on the fly at fast settings,
+leaving already-encoded responses and images untouched. Bodies smaller than
+COMPRESSION_MIN_SIZE are always sent as-is.
+"""
+
+import gzip
+import os
+import zlib
+from typing import Dict, Optional, Sequence
+
+from metrics import phase
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+
+# Preference order when the client accepts several encodings equally
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Content types that are already compressed
+SKIP_CONTENT_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip")
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    accepted = {}
+    for item in (header or "").split(","):
+        parts = item.strip().split(";")
+        name = parts[0].strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for parameter in parts[1:]:
+            key, _, value = parameter.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def choose_encoding(header: Optional[str], available: Sequence[str] = ENCODINGS) -> Optional[str]:
+    """Best available encoding the client accepts, or None for identity"""
+    accepted = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, fast: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=4 if fast else 11)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6 if fast else 9, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def precompress(body: bytes, fast: bool = False) -> Dict[str, bytes]:
+    """Every supported encoding of a body that is worth compressing"""
+    if len(body) < MIN_SIZE:
+        return {}
+    encoded = {}
+    for encoding in ENCODINGS:
+        compressed = compress(body, encoding, fast)
+        if len(compressed) < len(body):
+            encoded[encoding] = compressed
+    return encoded
+
+
+class _StreamCompressor:
+    """Incremental compressor that flushes after each chunk so streams stay live"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=4)
+        else:
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """On-the-fly compression for responses that were not precompressed"""
+
+    def __init__(self, app, minimum_size: int = MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+        compressor = None
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough, compressor
+            if message["type"] == "http.response.start":
+                headers = {name.lower(): value for name, value in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                passthrough = (
+                    b"content-encoding" in headers
+                    or content_type.startswith(SKIP_CONTENT_TYPES)
+                    or message["status"] in (204, 304)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                initial, start_message = start_message, None
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(initial)
+                    await send(message)
+                    return
+                headers = [
+                    (name, value) for name, value in initial.get("headers", [])
+                    if name.lower() != b"content-length"
+                ]
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+                headers.append((b"vary", b"Accept-Encoding"))
+                if not more_body:
+                    with phase("compress"):
+                        body = compress(body, encoding, fast=True)
+                    headers.append((b"content-length", str(len(body)).encode("latin-1")))
+                    await send({**initial, "headers": headers})
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                compressor = _StreamCompressor(encoding)
+                await send({**initial, "headers": headers})
+
+            with phase("compress"):
+                data = compressor.chunk(body) if body else b""
+                if not more_body:
+                    data += compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,185 @@
+"""
+Shared MongoDB connection for the API server and the maintenance scripts.
+The Motor client is created by connect_database() (from the FastAPI lifespan
+or a script's entry point) with pool settings read from .env, and closed by
+close_database(). Connection pool events are tracked for utilization metrics.
+
+Each uvicorn worker owns one pool, so the total connections a deployment can
+open is workers x MONGO_MAX_POOL_SIZE.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+# .env variable -> (MongoClient option, parser)
+POOL_SETTINGS = {
+    'MONGO_MAX_POOL_SIZE': ('maxPoolSize', int),
+    'MONGO_MIN_POOL_SIZE': ('minPoolSize', int),
+    'MONGO_MAX_IDLE_TIME_MS': ('maxIdleTimeMS', int),
+    'MONGO_WAIT_QUEUE_TIMEOUT_MS': ('waitQueueTimeoutMS', int),
+    'MONGO_SERVER_SELECTION_TIMEOUT_MS': ('serverSelectionTimeoutMS', int),
+    'MONGO_CONNECT_TIMEOUT_MS': ('connectTimeoutMS', int),
+    'MONGO_COMPRESSORS': ('compressors', str),
+}
+
+
+def client_options() -> Dict[str, Any]:
+    """Build MongoClient keyword options from the MONGO_* environment variables"""
+    options = {}
+    for env_name, (option, parse) in POOL_SETTINGS.items():
+        value = os.environ.get(env_name)
+        if value not in (None, ''):
+            options[option] = parse(value)
+    return options
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Counts connection pool events; pymongo calls these from driver threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.open = 0
+            self.in_use = 0
+            self.waiting = 0
+            self.created = 0
+            self.closed = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.pool_clears = 0
+            self.max_in_use = 0
+            self._pending: Dict[Any, float] = {}
+            self.checkout_wait_total = 0.0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+            self.created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open = max(0, self.open - 1)
+            self.closed += 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.waiting += 1
+            self._pending[threading.get_ident()] = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting = max(0, self.waiting - 1)
+            self.checkout_failures += 1
+            self._pending.pop(threading.get_ident(), None)
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.waiting = max(0, self.waiting - 1)
+            self.in_use += 1
+            self.checkouts += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            started = self._pending.pop(threading.get_ident(), None)
+            if started is not None:
+                self.checkout_wait_total += time.perf_counter() - started
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def stats(self, max_pool_size: int) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "maxPoolSize": max_pool_size,
+                "open": self.open,
+                "inUse": self.in_use,
+                "idle": max(0, self.open - self.in_use),
+                "waiting": self.waiting,
+                "maxInUse": self.max_in_use,
+                "utilization": round(self.in_use / max_pool_size, 4) if max_pool_size else 0.0,
+                "created": self.created,
+                "closed": self.closed,
+                "checkouts": self.checkouts,
+                "checkoutFailures": self.checkout_failures,
+                "avgCheckoutWaitMs": round(self.checkout_wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "poolClears": self.pool_clears,
+            }
+
+
+pool_monitor = PoolMonitor()
+
+_client: Optional[AsyncIOMotorClient] = None
+_database = None
+
+
+def connect_database():
+    """Create the shared Motor client if it does not exist yet and return the database"""
+    global _client, _database
+    if _client is None:
+        _client = AsyncIOMotorClient(
+            os.environ['MONGO_URL'],
+            event_listeners=[pool_monitor],
+            **client_options()
+        )
+        _database = _client[os.environ['DB_NAME']]
+    return _database
+
+
+def close_database():
+    global _client, _database
+    if _client is not None:
+        _client.close()
+        _client = None
+        _database = None
+
+
+def pool_stats() -> Dict[str, Any]:
+    max_pool_size = client_options().get('maxPoolSize', 100)
+    return pool_monitor.stats(max_pool_size)
+
+
+class _DatabaseProxy:
+    """Stands in for the Motor database so modules can import `db` before connecting"""
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __getitem__(self, name):
+        return self._resolve()[name]
+
+    @staticmethod
+    def _resolve():
+        if _database is None:
+            raise RuntimeError("MongoDB client is not connected; call connect_database() first")
+        return _database
+
+
+db = _DatabaseProxy()
@@ -0,0 +1,211 @@
+"""
+Server-sent events for live content updates.
+EventBroker fans each committed write out to the connected /api/events
+clients as a small diff: the collection, the document id, the operation, the
+names of the fields whose values changed (compared with the document a
+replace overwrote) and, when small enough, their new values. Every event is
+encoded once and shared by all subscribers.
+
+An idle connection costs one subscription and the response coroutine blocked
+on its wakeup event; a single broker task wakes them all for the heartbeat.
+Each subscription buffers at most `buffer_size` events. A client that falls
+further behind gets a "reset" event instead (refetch everything), and so does
+a client reconnecting with a Last-Event-ID this worker no longer remembers.
+Streams end after `max_age` seconds (checked on each wakeup) and the browser
+reconnects with Last-Event-ID, which spreads clients across workers and keeps
+open streams from holding up a graceful shutdown.
+"""
+
+import asyncio
+import secrets
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set, Tuple
+
+from snapshots import encode_json
+from writes import DELETE, REPLACE, UPDATE, Write
+
+HEARTBEAT = b": ping\n\n"
+RESET = b"event: reset\ndata: {}\n\n"
+# Browsers reconnect after this many milliseconds when a stream drops
+RETRY = b"retry: 3000\n\n"
+
+# Bookkeeping fields left out of change events
+IGNORED_FIELDS = ("_id", "createdAt", "updatedAt")
+# Fields the API serves with derived companions (the proxied imageSrc and
+# imageSrcset), which a client merging the raw value would leave stale
+DERIVED_FIELDS = ("image",)
+
+
+def describe_write(write: Write, max_value_bytes: int = 2048) -> Dict[str, Any]:
+    """Change event payload for a committed write"""
+    event: Dict[str, Any] = {
+        "collection": write.collection,
+        "id": write.filter.get("id", write.filter.get("category")),
+        "op": write.kind,
+    }
+    if write.kind == DELETE:
+        return event
+    fields = {name: value for name, value in write.document.items() if name not in IGNORED_FIELDS}
+    removed = []
+    previous = write.previous if write.kind == REPLACE else None
+    if previous is not None:
+        fields = {name: value for name, value in fields.items() if name not in previous or previous[name] != value}
+        removed = [name for name in previous if name not in write.document and name not in IGNORED_FIELDS]
+    event["changed"] = sorted([*fields, *removed])
+    # Values ride along only when small; otherwise clients refetch the document
+    if len(encode_json(fields)) <= max_value_bytes:
+        event["fields"] = fields
+    # Merging `fields` into the client's copy gives the new document, unless
+    # the write created it, dropped fields or changed a derived one
+    event["partial"] = (
+        (write.kind == UPDATE or (previous is not None and not removed))
+        and not any(name in DERIVED_FIELDS for name in event["changed"])
+    )
+    return event
+
+
+class Subscription:
+    __slots__ = ("queue", "wakeup", "overflowed", "heartbeat")
+
+    def __init__(self):
+        self.queue: Deque[bytes] = deque()
+        self.wakeup = asyncio.Event()
+        self.overflowed = False
+        self.heartbeat = False
+
+
+class EventBroker:
+    def __init__(
+        self,
+        buffer_size: int = 64,
+        heartbeat_interval: float = 15.0,
+        max_clients: int = 10000,
+        history_size: int = 256,
+        max_age: float = 300.0,
+    ):
+        self.buffer_size = buffer_size
+        self.heartbeat_interval = heartbeat_interval
+        self.max_age = max_age
+        self.max_clients = max_clients
+        # Event ids are "<epoch>-<sequence>"; the epoch tells a reconnecting
+        # client's Last-Event-ID apart from another worker's or a restart's
+        self.epoch = secrets.token_hex(4)
+        self._sequence = 0
+        self._history: Deque[Tuple[int, bytes]] = deque(maxlen=history_size)
+        self._subscribers: Set[Subscription] = set()
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._closed = False
+        self.published = 0
+        self.overflows = 0
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def full(self) -> bool:
+        return len(self._subscribers) >= self.max_clients
+
+    def start(self) -> None:
+        self._closed = False
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def stop(self) -> None:
+        """End every open stream so the server can shut down"""
+        self._closed = True
+        for subscription in self._subscribers:
+            subscription.wakeup.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        self._sequence += 1
+        message = (
+            f"id: {self.epoch}-{self._sequence}\nevent: {event}\ndata: ".encode("ascii")
+            + encode_json(data) + b"\n\n"
+        )
+        self._history.append((self._sequence, message))
+        self.published += 1
+        for subscription in self._subscribers:
+            self._deliver(subscription, message)
+
+    def _deliver(self, subscription: Subscription, message: bytes) -> None:
+        if subscription.overflowed:
+            return
+        if len(subscription.queue) >= self.buffer_size:
+            subscription.queue.clear()
+            subscription.overflowed = True
+            self.overflows += 1
+        else:
+            subscription.queue.append(message)
+        subscription.wakeup.set()
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Subscription:
+        subscription = Subscription()
+        if last_event_id:
+            self._replay(subscription, last_event_id)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def _replay(self, subscription: Subscription, last_event_id: str) -> None:
+        """Queue what a reconnecting client missed, or a reset if that is unknown"""
+        epoch, _, sequence = last_event_id.partition("-")
+        if epoch != self.epoch or not sequence.isdigit():
+            subscription.overflowed = True
+        else:
+            last = int(sequence)
+            oldest = self._history[0][0] if self._history else self._sequence + 1
+            if last + 1 < oldest:
+                subscription.overflowed = True
+            else:
+                for number, message in self._history:
+                    if number > last:
+                        self._deliver(subscription, message)
+        if subscription.overflowed:
+            subscription.wakeup.set()
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """Body of one text/event-stream response"""
+        subscription = self.subscribe(last_event_id)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_age
+        try:
+            yield RETRY
+            while not self._closed and loop.time() < deadline:
+                await subscription.wakeup.wait()
+                subscription.wakeup.clear()
+                if subscription.overflowed:
+                    subscription.overflowed = False
+                    subscription.queue.clear()
+                    yield RESET
+                elif subscription.queue:
+                    chunk = b"".join(subscription.queue)
+                    subscription.queue.clear()
+                    yield chunk
+                elif subscription.heartbeat:
+                    yield HEARTBEAT
+                subscription.heartbeat = False
+        finally:
+            self.unsubscribe(subscription)
+
+    async def _heartbeat(self) -> None:
+        # Comments keep proxies and load balancers from closing idle streams
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            for subscription in self._subscribers:
+                subscription.heartbeat = True
+                subscription.wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self._subscribers),
+            "maxClients": self.max_clients,
+            "published": self.published,
+            "overflows": self.overflows,
+        }
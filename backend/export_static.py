@@ -0,0 +1,179 @@
+"""
+Static export of the read-only API.
+Runs the FastAPI app in-process against the configured MongoDB, requests every
+GET route (including each project type variant) and writes the responses as
+files that nginx or a CDN can serve without the API server:
+
+    <out>/api/profile.json                           stable name, revalidated
+    <out>/api/profile.<hash>.json                    content-addressed, immutable
+    <out>/api/profile.json.gz / .json.br             precompressed variants
+    <out>/api/projects/project_type/Robotics.json    ?project_type=Robotics
+    <out>/manifest.json                              route -> files and hashes
+
+The export is built in a sibling directory and swapped into place, so a
+server pointed at <out> never serves a half-written tree.
+
+Usage: python export_static.py --out ../frontend/public/static-api
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, quote, urlsplit
+
+HASH_LENGTH = 12
+EXTENSIONS = {"gzip": ".gz", "br": ".br"}
+
+
+def route_file(route: str) -> str:
+    """Relative file path for a route, with query parameters as path segments"""
+    parts = urlsplit(route)
+    path = parts.path.strip("/")
+    for name, value in parse_qsl(parts.query):
+        path += f"/{quote(name, safe='')}/{quote(value, safe='')}"
+    return path + ".json"
+
+
+def hashed_name(path: str, digest: str) -> str:
+    stem = path[:-len(".json")]
+    return f"{stem}.{digest[:HASH_LENGTH]}.json"
+
+
+async def fetch_route(client, route: str):
+    """GET a route, failing on error statuses and {"success": false} bodies"""
+    response = await client.get(route)
+    response.raise_for_status()
+    if not response.json().get("success", False):
+        raise RuntimeError(f"{route} failed: {response.json().get('message')}")
+    return response
+
+
+async def discover_routes(client) -> List[str]:
+    """Every GET route worth exporting, expanded with the values stored in the database"""
+    facets = (await fetch_route(client, "/api/projects/facets")).json()["facets"]
+    works = (await fetch_route(client, "/api/creative-works?summary=true")).json()["data"]
+    project_types = sorted(facets["type"])
+
+    routes = [
+        "/api/portfolio",
+        "/api/profile",
+        "/api/education",
+        "/api/skills",
+        "/api/projects",
+        "/api/projects/facets",
+        "/api/achievements",
+        "/api/creative-works",
+        "/api/creative-works?summary=true",
+        "/api/photography",
+    ]
+    for project_type in project_types:
+        value = quote(project_type, safe="")
+        routes.append(f"/api/portfolio?project_type={value}")
+        routes.append(f"/api/projects?project_type={value}")
+        routes.append(f"/api/projects/facets?type={value}")
+    routes.extend(f"/api/creative-works/{quote(str(work['id']), safe='')}" for work in works)
+    return routes
+
+
+def write_route(out_dir: Path, route: str, body: bytes) -> Dict[str, object]:
+    """Write one route's body under its stable and hashed names with every encoding"""
+    from compression import precompress
+
+    path = route_file(route)
+    digest = hashlib.sha256(body).hexdigest()
+    hashed = hashed_name(path, digest)
+    encoded = precompress(body)
+
+    for name in (path, hashed):
+        target = out_dir / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(body)
+        for encoding, data in encoded.items():
+            (out_dir / (name + EXTENSIONS[encoding])).write_bytes(data)
+
+    return {
+        "file": path,
+        "hashed": hashed,
+        "sha256": digest,
+        "bytes": len(body),
+        "encodings": {encoding: len(data) for encoding, data in encoded.items()},
+    }
+
+
+def swap_directory(build_dir: Path, out_dir: Path) -> None:
+    """Replace out_dir with build_dir, keeping the old tree until the new one is in place"""
+    previous = out_dir.with_name(out_dir.name + ".previous")
+    if previous.exists():
+        shutil.rmtree(previous)
+    if out_dir.exists():
+        os.replace(out_dir, previous)
+    os.replace(build_dir, out_dir)
+    if previous.exists():
+        shutil.rmtree(previous)
+
+
+async def export_static(out_dir: Path, routes: Optional[List[str]] = None) -> Dict[str, object]:
+    import httpx
+
+    # A one-off run has no other workers to hear from, and every request comes
+    # from this one in-process client, which the per-IP rate limit would throttle
+    os.environ["CACHE_INVALIDATION"] = "off"
+    os.environ["RATE_LIMIT_PER_SECOND"] = "0"
+    sys.path.insert(0, str(Path(__file__).parent))
+    import server
+
+    out_dir = Path(out_dir).resolve()
+    build_dir = out_dir.with_name(out_dir.name + ".building")
+    if build_dir.exists():
+        shutil.rmtree(build_dir)
+    build_dir.mkdir(parents=True)
+
+    manifest: Dict[str, object] = {"generatedAt": int(time.time()), "routes": {}}
+    try:
+        async with server.app.router.lifespan_context(server.app):
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://export", headers={"Accept-Encoding": "identity"}
+            ) as client:
+                for route in routes or await discover_routes(client):
+                    response = await fetch_route(client, route)
+                    manifest["routes"][route] = write_route(build_dir, route, response.content)
+                    print(f"✅ {route}")
+
+        (build_dir / "manifest.json").write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    except BaseException:
+        # Leave the previous export as the only tree on disk
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+    swap_directory(build_dir, out_dir)
+    return manifest
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export every GET route of the portfolio API as static files")
+    parser.add_argument("--out", default=str(Path(__file__).parent / "static_export"),
+                        help="directory to write (replaced atomically)")
+    parser.add_argument("--route", action="append", dest="routes",
+                        help="export only this route (repeatable), e.g. /api/profile")
+    args = parser.parse_args()
+
+    print("📦 Exporting the portfolio API...")
+    try:
+        manifest = asyncio.run(export_static(Path(args.out), args.routes))
+    except Exception as e:
+        print(f"💥 Export failed: {e}")
+        return 1
+    total = sum(entry["bytes"] for entry in manifest["routes"].values())
+    print(f"🎉 Exported {len(manifest['routes'])} routes ({total} bytes) to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
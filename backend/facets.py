@@ -0,0 +1,109 @@
+"""
+Faceted filtering over projects from precomputed bitmaps.
+Each project gets a bit position in display order, and every facet value
+(type, technology, year) maps to an int bitmask of the projects carrying it.
+Filters are OR within a facet and AND across facets; facet counts are
+disjunctive, i.e. each facet is counted with every other facet's filter
+applied, so selecting one type still shows how many projects the other
+types would return.
+"""
+
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+YEAR_PATTERN = re.compile(r"(19|20)\d{2}")
+ONGOING_PATTERN = re.compile(r"present|current|ongoing|now", re.IGNORECASE)
+
+FACETS = ("type", "technologies", "year")
+
+
+def parse_years(date: Optional[str], current_year: Optional[int] = None) -> Tuple[int, ...]:
+    """Years covered by a free-form Project.date such as '2024', 'Dec 2024 – Jun 2025' or 'Currently Working'"""
+    current_year = current_year or datetime.utcnow().year
+    years = [int(match.group(0)) for match in YEAR_PATTERN.finditer(date or "")]
+    ongoing = bool(ONGOING_PATTERN.search(date or ""))
+    if not years:
+        return (current_year,) if ongoing else ()
+    start = min(years)
+    end = current_year if ongoing else max(years)
+    return tuple(range(start, max(start, end) + 1))
+
+
+class ProjectFacets:
+    def __init__(self):
+        self.projects: List[dict] = []
+        self.all = 0
+        self.bitmaps: Dict[str, Dict[str, int]] = {facet: {} for facet in FACETS}
+
+    def __len__(self) -> int:
+        return len(self.projects)
+
+    def rebuild(self, projects: List[dict], current_year: Optional[int] = None) -> None:
+        """Recompute every bitmap from the projects in display order"""
+        bitmaps: Dict[str, Dict[str, int]] = {facet: {} for facet in FACETS}
+        for position, project in enumerate(projects):
+            bit = 1 << position
+            values = {
+                "type": [project.get("type")] if project.get("type") else [],
+                "technologies": project.get("technologies") or [],
+                "year": [str(year) for year in parse_years(project.get("date"), current_year)],
+            }
+            for facet, facet_values in values.items():
+                bitmap = bitmaps[facet]
+                for value in facet_values:
+                    bitmap[value] = bitmap.get(value, 0) | bit
+
+        # Swap everything at once so concurrent queries never see a partial index
+        self.projects = list(projects)
+        self.all = (1 << len(projects)) - 1
+        self.bitmaps = bitmaps
+
+    def _facet_mask(self, facet: str, values: Iterable[str]) -> int:
+        bitmap = self.bitmaps[facet]
+        mask = 0
+        for value in values:
+            mask |= bitmap.get(value, 0)
+        return mask
+
+    def year_values(self, year_from: Optional[int], year_to: Optional[int]) -> List[str]:
+        """Indexed years within an inclusive range"""
+        return [
+            year for year in self.bitmaps["year"]
+            if (year_from is None or int(year) >= year_from) and (year_to is None or int(year) <= year_to)
+        ]
+
+    def query(self, filters: Dict[str, Optional[List[str]]]) -> Tuple[List[dict], Dict[str, Dict[str, int]]]:
+        """Matching projects and disjunctive facet counts for the given filters"""
+        masks = {
+            facet: self._facet_mask(facet, values)
+            for facet, values in filters.items() if values is not None
+        }
+
+        result = self.all
+        for mask in masks.values():
+            result &= mask
+
+        counts = {}
+        for facet in FACETS:
+            others = self.all
+            for other, mask in masks.items():
+                if other != facet:
+                    others &= mask
+            counts[facet] = {
+                value: (bitmap & others).bit_count()
+                for value, bitmap in sorted(self.bitmaps[facet].items())
+                if bitmap & others
+            }
+
+        matches = []
+        position = 0
+        while result:
+            if result & 1:
+                matches.append(self.projects[position])
+            result >>= 1
+            position += 1
+        return matches, counts
+
+    def stats(self) -> Dict[str, int]:
+        return {"projects": len(self.projects), **{facet: len(values) for facet, values in self.bitmaps.items()}}
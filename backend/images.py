@@ -0,0 +1,225 @@
+"""
+Image proxy for project and photography images.
+Originals are fetched once from their source URL, resized into fixed width
+buckets and re-encoded (AVIF or WebP when the client accepts it), and every
+file is kept in a size-bounded on-disk LRU cache. Image ids are derived from
+the source URL, so a variant never changes and can be served as immutable;
+only URLs stored in the portfolio collections can be proxied.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import mimetypes
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+WIDTH_BUCKETS = (320, 640, 960, 1280, 1920)
+DEFAULT_WIDTH = 960
+MAX_ORIGINAL_BYTES = 20 * 1024 * 1024
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Output formats in order of preference: (Accept media type, Pillow format, extension)
+OUTPUT_FORMATS = (
+    ("image/avif", "AVIF", "avif"),
+    ("image/webp", "WEBP", "webp"),
+)
+ENCODE_QUALITY = {"AVIF": 55, "WEBP": 80, "JPEG": 82}
+MEDIA_TYPES = {"AVIF": "image/avif", "WEBP": "image/webp", "JPEG": "image/jpeg", "PNG": "image/png"}
+
+
+def image_id(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:20]
+
+
+def width_bucket(width: Optional[int]) -> int:
+    """Round a requested width up to the nearest bucket"""
+    if not width:
+        return DEFAULT_WIDTH
+    for bucket in WIDTH_BUCKETS:
+        if width <= bucket:
+            return bucket
+    return WIDTH_BUCKETS[-1]
+
+
+def image_urls(url: str) -> Dict[str, str]:
+    """Proxy URLs for a source image, relative to the site root"""
+    base = f"/api/images/{image_id(url)}"
+    return {
+        "imageId": image_id(url),
+        "imageSrc": f"{base}?w={DEFAULT_WIDTH}",
+        "imageSrcset": ", ".join(f"{base}?w={width} {width}w" for width in WIDTH_BUCKETS),
+    }
+
+
+def _pillow_formats() -> Tuple[Tuple[str, str, str], ...]:
+    try:
+        from PIL import features
+    except ImportError:
+        return ()
+    return tuple(entry for entry in OUTPUT_FORMATS if features.check(entry[2]))
+
+
+def negotiate_format(accept: str) -> Optional[Tuple[str, str, str]]:
+    """Pick the best output format the client accepts and Pillow can encode"""
+    accept = accept or ""
+    for entry in _pillow_formats():
+        if entry[0] in accept:
+            return entry
+    return None
+
+
+def render_variant(original: bytes, width: int, pillow_format: Optional[str]) -> Tuple[bytes, str]:
+    """Resize (never upscale) and encode; returns the body and its Pillow format"""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(original)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+
+        output_format = pillow_format or ("PNG" if image.mode in ("RGBA", "LA", "P") else "JPEG")
+        if output_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        buffer = io.BytesIO()
+        image.save(buffer, output_format, quality=ENCODE_QUALITY.get(output_format, 85))
+        return buffer.getvalue(), output_format
+
+
+class DiskLRU:
+    """Files under a directory with least-recently-used eviction past max_bytes"""
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._files: "OrderedDict[str, int]" = OrderedDict()
+        self.size = 0
+        existing = sorted(
+            (path for path in self.directory.rglob("*") if path.is_file() and not path.name.endswith(".tmp")),
+            key=lambda path: path.stat().st_mtime,
+        )
+        for path in existing:
+            name = str(path.relative_to(self.directory))
+            self._files[name] = path.stat().st_size
+            self.size += self._files[name]
+        self._evict()
+
+    def get(self, name: str) -> Optional[Path]:
+        if name not in self._files:
+            return None
+        path = self.directory / name
+        if not path.exists():
+            self.size -= self._files.pop(name)
+            return None
+        self._files.move_to_end(name)
+        return path
+
+    def put(self, name: str, body: bytes) -> Path:
+        path = self.directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(path.name + ".tmp")
+        temporary.write_bytes(body)
+        os.replace(temporary, path)
+
+        self.size -= self._files.pop(name, 0)
+        self._files[name] = len(body)
+        self.size += len(body)
+        self._evict(keep=name)
+        return path
+
+    def _evict(self, keep: Optional[str] = None):
+        while self.size > self.max_bytes and self._files:
+            name = next(iter(self._files))
+            if name == keep:
+                if len(self._files) == 1:
+                    break
+                self._files.move_to_end(name)
+                continue
+            self.size -= self._files.pop(name)
+            try:
+                (self.directory / name).unlink()
+            except FileNotFoundError:
+                pass
+
+
+class ImageProxy:
+    def __init__(self, cache_dir: Path, max_bytes: int, fetch_timeout: float = 15.0):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.fetch_timeout = fetch_timeout
+        self._store: Optional[DiskLRU] = None
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.sources: Dict[str, str] = {}
+
+    @property
+    def store(self) -> DiskLRU:
+        # Created on first use so importing the server never touches the disk
+        if self._store is None:
+            self._store = DiskLRU(self.cache_dir, self.max_bytes)
+        return self._store
+
+    def register(self, document: dict) -> dict:
+        """Remember a document's image source and add its proxy URLs"""
+        url = document.get("image")
+        if url:
+            urls = image_urls(url)
+            self.sources[urls["imageId"]] = url
+            document.update(urls)
+        return document
+
+    async def _fetch_original(self, image_key: str, url: str) -> bytes:
+        name = f"{image_key}/original"
+        path = self.store.get(name)
+        if path is not None:
+            return path.read_bytes()
+
+        import httpx
+        async with httpx.AsyncClient(timeout=self.fetch_timeout, follow_redirects=True) as client:
+            response = await client.get(url)
+            response.raise_for_status()
+            if not response.headers.get("content-type", "").startswith("image/"):
+                raise ValueError(f"Source is not an image: {url}")
+            body = response.content
+        if len(body) > MAX_ORIGINAL_BYTES:
+            raise ValueError(f"Source image too large: {url}")
+        self.store.put(name, body)
+        return body
+
+    async def variant(self, image_key: str, width: Optional[int], accept: str) -> Tuple[Path, str]:
+        """Return the cached variant file and its media type, rendering it on first use"""
+        url = self.sources[image_key]
+        width = width_bucket(width)
+        negotiated = negotiate_format(accept)
+
+        lock = self._locks.setdefault(image_key, asyncio.Lock())
+        async with lock:
+            for extension, media_type in self._candidates(negotiated):
+                path = self.store.get(f"{image_key}/{width}.{extension}")
+                if path is not None:
+                    return path, media_type
+
+            original = await self._fetch_original(image_key, url)
+            try:
+                body, output_format = await asyncio.to_thread(
+                    render_variant, original, width, negotiated[1] if negotiated else None
+                )
+            except ImportError:
+                logging.warning("Pillow is not installed; serving original images unmodified")
+                media_type = mimetypes.guess_type(url)[0] or "application/octet-stream"
+                return self.store.get(f"{image_key}/original"), media_type
+
+            extension = output_format.lower().replace("jpeg", "jpg")
+            path = self.store.put(f"{image_key}/{width}.{extension}", body)
+            return path, MEDIA_TYPES[output_format]
+
+    @staticmethod
+    def _candidates(negotiated):
+        if negotiated:
+            return [(negotiated[2], negotiated[0])]
+        return [("jpg", "image/jpeg"), ("png", "image/png")]
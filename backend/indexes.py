@@ -0,0 +1,146 @@
+"""
+Declarative index registry for the portfolio collections.
+ensure_indexes() is run at server startup and by the seeder; running this
+module directly also explains every route query and flags collection scans:
+
+    python indexes.py            # ensure indexes, then report
+    python indexes.py --no-ensure
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from typing import Any, Dict, List, Optional
+
+from pymongo import ASCENDING, IndexModel
+
+from database import close_database, connect_database
+
+# Indexes backing the sort/filter keys used by the readers in server.py
+# (lists sort and paginate on (order, id)), plus a unique business key
+# per collection
+INDEXES: Dict[str, List[IndexModel]] = {
+    "education": [
+        IndexModel([("order", ASCENDING), ("id", ASCENDING)], name="order_1_id_1"),
+        IndexModel([("id", ASCENDING)], name="id_1", unique=True),
+    ],
+    "skills": [
+        IndexModel([("category", ASCENDING)], name="category_1", unique=True),
+    ],
+    "projects": [
+        IndexModel([("type", ASCENDING), ("order", ASCENDING), ("id", ASCENDING)], name="type_1_order_1_id_1"),
+        IndexModel([("order", ASCENDING), ("id", ASCENDING)], name="order_1_id_1"),
+        IndexModel([("id", ASCENDING)], name="id_1", unique=True),
+    ],
+    "achievements": [
+        IndexModel([("order", ASCENDING), ("id", ASCENDING)], name="order_1_id_1"),
+        IndexModel([("id", ASCENDING)], name="id_1", unique=True),
+    ],
+    "creative_works": [
+        IndexModel([("id", ASCENDING)], name="id_1", unique=True),
+    ],
+    "photography": [
+        IndexModel([("order", ASCENDING), ("id", ASCENDING)], name="order_1_id_1"),
+        IndexModel([("id", ASCENDING)], name="id_1", unique=True),
+    ],
+    "analytics": [
+        IndexModel([("kind", ASCENDING), ("day", ASCENDING)], name="kind_1_day_1"),
+    ],
+}
+
+# The filter/sort shape of each indexed route query, used by the explain report
+ROUTE_QUERIES = [
+    {"route": "GET /api/education", "collection": "education", "filter": {}, "sort": [("order", ASCENDING), ("id", ASCENDING)]},
+    {"route": "GET /api/projects", "collection": "projects", "filter": {}, "sort": [("order", ASCENDING), ("id", ASCENDING)]},
+    {"route": "GET /api/projects?project_type=", "collection": "projects", "filter": {"type": "Robotics"}, "sort": [("order", ASCENDING), ("id", ASCENDING)]},
+    {"route": "GET /api/achievements", "collection": "achievements", "filter": {}, "sort": [("order", ASCENDING), ("id", ASCENDING)]},
+    {"route": "GET /api/creative-works/{id}", "collection": "creative_works", "filter": {"id": "1"}, "sort": None},
+    {"route": "GET /api/photography", "collection": "photography", "filter": {}, "sort": [("order", ASCENDING), ("id", ASCENDING)]},
+    {"route": "GET /api/stats", "collection": "analytics", "filter": {"kind": "project", "day": {"$gte": "2024-01-01"}}, "sort": None},
+]
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """Create any missing registry indexes; returns the index names per collection"""
+    created = {}
+    for collection in INDEXES:
+        created[collection] = await ensure_collection_indexes(db, collection)
+    return created
+
+
+async def ensure_collection_indexes(db, collection: str, target: Optional[str] = None) -> List[str]:
+    """Create the registry indexes of one collection, optionally on another (shadow) collection"""
+    models = INDEXES.get(collection)
+    if not models:
+        return []
+    return await db[target or collection].create_indexes(models)
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for key in ("queryPlan", "inputStage", "inputStages"):
+            if key in plan:
+                stages.extend(_plan_stages(plan[key]))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def explain_routes(db) -> List[Dict[str, Any]]:
+    """Explain each route query and report its winning plan stages"""
+    report = []
+    for query in ROUTE_QUERIES:
+        cursor = db[query["collection"]].find(query["filter"], {"_id": 0})
+        if query["sort"]:
+            cursor = cursor.sort(query["sort"])
+        explanation = await cursor.explain()
+        stages = _plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+        report.append({
+            "route": query["route"],
+            "collection": query["collection"],
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+            "inMemorySort": "SORT" in stages,
+        })
+    return report
+
+
+async def main(ensure: bool = True) -> int:
+    db = connect_database()
+
+    try:
+        if ensure:
+            created = await ensure_indexes(db)
+            for collection, names in created.items():
+                print(f"✅ {collection}: {', '.join(names)}")
+
+        report = await explain_routes(db)
+        flagged = 0
+        print("\n📊 Route query plans")
+        for entry in report:
+            status = "⚠️  COLLSCAN" if entry["collscan"] else "✅ IXSCAN"
+            if entry["inMemorySort"]:
+                status += " + in-memory SORT"
+            flagged += entry["collscan"]
+            print(f"{status:<28} {entry['route']}  ({' <- '.join(entry['stages'])})")
+
+        if flagged:
+            print(f"\n💥 {flagged} route queries scan their whole collection")
+        return 1 if flagged else 0
+    except Exception as e:
+        logging.error(f"Error checking indexes: {e}")
+        return 1
+    finally:
+        close_database()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ensure portfolio indexes and explain route queries")
+    parser.add_argument("--no-ensure", action="store_true", help="only report, do not create indexes")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(ensure=not args.no_ensure)))
@@ -0,0 +1,259 @@
+"""
+Cross-worker cache invalidation.
+Every uvicorn worker keeps its own response cache, snapshots and in-memory
+indexes. ChangeWatcher subscribes to a MongoDB change stream on the portfolio
+collections and runs the local write hook whenever another process changes
+them. Standalone servers have no change streams, so writers also bump a
+per-collection counter in the cache_versions collection, and the watcher falls
+back to polling those counters.
+
+A worker's own writes come back to it through both channels. It remembers the
+counter values its publishes produced and skips them when polling, and it
+skips as many change stream events on a collection as its own bulk_writes
+reported changing (see expect_local()/local_written()).
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set
+
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_COLLECTION = "cache_versions"
+
+# Change stream operations that can alter what the readers return
+WATCHED_OPERATIONS = ["insert", "update", "replace", "delete", "drop", "rename", "dropDatabase"]
+
+MODES = ("auto", "changestream", "poll", "off")
+
+
+async def publish_changes(database, *collections: str) -> Dict[str, int]:
+    """Bump the version counters for collections a process just wrote; returns the new versions"""
+    names = sorted(set(collections))
+    documents = await asyncio.gather(*(
+        database[VERSIONS_COLLECTION].find_one_and_update(
+            {"_id": name}, {"$inc": {"version": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        for name in names
+    ))
+    return {name: document["version"] for name, document in zip(names, documents)}
+
+
+async def read_versions(database, collections: Iterable[str]) -> Dict[str, int]:
+    """Current version counter of each collection that has been published"""
+    documents = await database[VERSIONS_COLLECTION].find(
+        {"_id": {"$in": list(collections)}}
+    ).to_list(None)
+    return {document["_id"]: document.get("version", 0) for document in documents}
+
+
+def _change_streams_unsupported(error: Exception) -> bool:
+    if isinstance(error, NotImplementedError):
+        return True
+    if isinstance(error, OperationFailure):
+        # 40573: $changeStream is only supported on replica sets
+        return error.code in (40573, 40324) or "replica set" in str(error).lower()
+    return False
+
+
+class ChangeWatcher:
+    def __init__(
+        self,
+        database,
+        collections: Iterable[str],
+        on_change: Callable[..., Awaitable[None]],
+        mode: str = "auto",
+        poll_interval: float = 2.0,
+        debounce: float = 0.1,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown invalidation mode: {mode}")
+        self.database = database
+        self.collections = sorted(set(collections))
+        self.on_change = on_change
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.active_mode: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._changed: Set[str] = set()
+        self._versions: Dict[str, int] = {}
+        # Counter values bumped by this worker, not yet seen by the poller
+        self._published: Dict[str, Set[int]] = {}
+        # Change events this worker's own writes are still expected to produce
+        self._echoes: Dict[str, int] = {}
+        self.notifications = 0
+        self.invalidations = 0
+        self.skipped = 0
+
+    async def start(self) -> None:
+        if self.mode == "off":
+            self.active_mode = "off"
+            return
+        # Remember where the counters stand so startup does not look like a change
+        self._versions = await read_versions(self.database, self.collections)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        for task in (self._task, self._flush_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._task = self._flush_task = None
+
+    async def publish(self, *collections: str) -> None:
+        """Announce local writes to the other workers"""
+        if self.mode == "off":
+            return
+        try:
+            versions = await publish_changes(self.database, *collections)
+        except Exception as e:
+            logger.error(f"Error publishing changes for {', '.join(collections)}: {e}")
+            return
+        for name, version in versions.items():
+            self._published.setdefault(name, set()).add(version)
+
+    def expect_local(self, collection: str, operations: int) -> None:
+        """Before a local bulk_write: its change events are this worker's own"""
+        if self.active_mode == "changestream":
+            self._echoes[collection] = self._echoes.get(collection, 0) + operations
+
+    def local_written(self, collection: str, operations: int, changed: Optional[int]) -> None:
+        """After the bulk_write: `changed` documents were changed, None when unknown"""
+        if collection not in self._echoes:
+            return
+        left = self._echoes[collection] - (operations - (changed or 0))
+        self._echoes[collection] = max(0, left)
+        if left < 0:
+            # More events were skipped than the write produced, so some of them
+            # came from another process
+            self._notify([collection])
+
+    async def _run(self) -> None:
+        if self.mode in ("auto", "changestream"):
+            try:
+                await self._watch()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.mode == "changestream":
+                    logger.error(f"Change stream watcher stopped: {e}")
+                    return
+                if not _change_streams_unsupported(e):
+                    logger.warning(f"Could not open a change stream: {e}")
+                logger.info(f"Change streams unavailable, polling {VERSIONS_COLLECTION} instead")
+        await self._poll()
+
+    async def _watch(self) -> None:
+        pipeline = [{"$match": {
+            "operationType": {"$in": WATCHED_OPERATIONS},
+            "$or": [
+                {"ns.coll": {"$in": self.collections}},
+                # rename events name the target (e.g. a seeder's shadow swap) in "to"
+                {"to.coll": {"$in": self.collections}},
+                {"operationType": "dropDatabase"},
+            ],
+        }}]
+        resume_token = None
+        opened = False
+        while True:
+            try:
+                async with self.database.watch(pipeline, resume_after=resume_token) as stream:
+                    # try_next opens the cursor, so an unsupported server fails here
+                    change = await stream.try_next()
+                    if not opened:
+                        opened = True
+                        self.active_mode = "changestream"
+                        logger.info("Watching portfolio collections through a change stream")
+                    while True:
+                        if change is not None:
+                            self._notify(self._collections_in(change, skip_local=True))
+                        resume_token = stream.resume_token
+                        change = await stream.try_next()
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                if not opened:
+                    raise
+                # Events may have been missed while disconnected; drop everything
+                logger.warning(f"Change stream interrupted, resuming: {e}")
+                self._notify(self.collections)
+                await asyncio.sleep(self.poll_interval)
+
+    def _collections_in(self, change: dict, skip_local: bool = False) -> Iterable[str]:
+        operation = change.get("operationType")
+        if operation == "dropDatabase":
+            return self.collections
+        if skip_local and operation in ("insert", "update", "replace", "delete"):
+            collection = change.get("ns", {}).get("coll")
+            if self._echoes.get(collection):
+                self._echoes[collection] -= 1
+                self.skipped += 1
+                return []
+        names = {change.get("ns", {}).get("coll"), change.get("to", {}).get("coll")}
+        return [name for name in names if name in self.collections]
+
+    async def _poll(self) -> None:
+        self.active_mode = "poll"
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                versions = await read_versions(self.database, self.collections)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error polling {VERSIONS_COLLECTION}: {e}")
+                continue
+            changed = []
+            for name, version in versions.items():
+                seen = self._versions.get(name, 0)
+                published = self._published.pop(name, set())
+                # Changed elsewhere unless every bump since the last poll was ours
+                own = sum(1 for number in published if seen < number <= version)
+                if version < seen or own < version - seen:
+                    changed.append(name)
+                elif own:
+                    self.skipped += 1
+                later = {number for number in published if number > version}
+                if later:
+                    self._published[name] = later
+            self._versions = versions
+            self._notify(changed)
+
+    def _notify(self, collections: Iterable[str]) -> None:
+        """Collect changed collections and run the hook once per debounce window"""
+        collections = set(collections)
+        if not collections:
+            return
+        self.notifications += 1
+        self._changed |= collections
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        # Loops so collections changed while the hook runs are not left behind
+        while self._changed:
+            await asyncio.sleep(self.debounce)
+            changed, self._changed = sorted(self._changed), set()
+            self.invalidations += 1
+            try:
+                await self.on_change(*changed)
+            except Exception as e:
+                logger.error(f"Error invalidating {', '.join(changed)}: {e}")
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "mode": self.mode,
+            "activeMode": self.active_mode,
+            "notifications": self.notifications,
+            "invalidations": self.invalidations,
+            "skippedOwn": self.skipped,
+        }
@@ -0,0 +1,227 @@
+"""
+Request and MongoDB instrumentation in the Prometheus text exposition format.
+MetricsMiddleware records count, latency, response size and status for every
+route, and the time spent in Mongo and in JSON encoding while handling the
+request, so slow requests can be attributed to the framework, serialization
+or the database. render() produces the body served at /metrics.
+"""
+
+import contextvars
+import functools
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[index] += 1
+                break
+        else:
+            state[len(self.buckets)] += 1
+        state[-1] += value
+
+    def samples(self) -> Iterable[str]:
+        for labels, state in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(state[-1])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Collector:
+    """Metric whose samples are read from a callback at scrape time"""
+
+    def __init__(self, name: str, documentation: str, type_name: str, labelnames: Sequence[str],
+                 collect: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]):
+        self.name = name
+        self.documentation = documentation
+        self.type_name = type_name
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self.collect():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+REGISTRY: List = []
+
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type_name}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+REQUESTS = register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")))
+REQUEST_LATENCY = register(Histogram(
+    "http_request_duration_seconds", "Time from request start to the last response byte", ("method", "route")))
+RESPONSE_SIZE = register(Histogram(
+    "http_response_size_bytes", "Response body size", ("method", "route"), buckets=SIZE_BUCKETS))
+REQUEST_PHASE = register(Histogram(
+    "http_request_phase_seconds", "Time spent per request in each phase (mongo, serialize, compress)", ("route", "phase")))
+MONGO_LATENCY = register(Histogram(
+    "mongo_operation_duration_seconds", "MongoDB call latency as seen by the handlers", ("collection", "operation")))
+
+# Per-request phase totals, set by the middleware and filled by phase()
+_request_phases: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "request_phases", default=None)
+
+# Per-request Mongo calls in order, kept for slow-request captures
+_request_trace: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_trace", default=None)
+
+
+def request_phases() -> Optional[Dict[str, float]]:
+    """Phase totals of the request being handled, if any"""
+    return _request_phases.get()
+
+
+def request_trace() -> Optional[List[Tuple[str, float]]]:
+    """(collection.operation, seconds) for each Mongo call of the request being handled"""
+    return _request_trace.get()
+
+
+@contextmanager
+def phase(name: str):
+    """Add the time spent in the block to the current request's phase totals"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = _request_phases.get()
+        if phases is not None:
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - started
+
+
+@contextmanager
+def mongo_timer(collection: str, operation: str):
+    """Time a Mongo call per collection and add it to the request's mongo phase"""
+    started = time.perf_counter()
+    try:
+        with phase("mongo"):
+            yield
+    finally:
+        elapsed = time.perf_counter() - started
+        MONGO_LATENCY.observe(elapsed, collection, operation)
+        trace = _request_trace.get()
+        if trace is not None:
+            trace.append((f"{collection}.{operation}", elapsed))
+
+
+def mongo_timed(collection: str, operation: str = "find"):
+    """Decorator form of mongo_timer for async readers"""
+    def decorator(reader):
+        @functools.wraps(reader)
+        async def wrapper(*args, **kwargs):
+            with mongo_timer(collection, operation):
+                return await reader(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware so streamed bodies are measured without buffering"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        size = 0
+        phases: Dict[str, float] = {}
+        token = _request_phases.set(phases)
+        trace_token = _request_trace.set([])
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_phases.reset(token)
+            _request_trace.reset(trace_token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            REQUESTS.inc(method, route_path, str(status))
+            REQUEST_LATENCY.observe(time.perf_counter() - started, method, route_path)
+            RESPONSE_SIZE.observe(size, method, route_path)
+            for name, seconds in phases.items():
+                REQUEST_PHASE.observe(seconds, route_path, name)
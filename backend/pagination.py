@@ -0,0 +1,73 @@
+"""
+Keyset pagination helpers for the ordered list endpoints.
+Pages are sorted on (order, id) and continued with an opaque cursor that
+encodes the last key returned, so every page is a bounded index range scan.
+"""
+
+import base64
+import json
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, Query
+
+MAX_PAGE_SIZE = 500
+
+# Sort used by every paginated/streamed list; backed by the (order, id) indexes
+KEYSET_SORT = [("order", 1), ("id", 1)]
+
+
+class Page(NamedTuple):
+    items: List[dict]
+    next: Optional[str]
+
+
+def encode_cursor(document: dict) -> str:
+    raw = json.dumps([document.get("order"), document.get("id")], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        order, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return order, doc_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def keyset_query(query: dict, after: Optional[Tuple[Any, Any]]) -> dict:
+    """Restrict a filter to documents strictly after the (order, id) key"""
+    if after is None:
+        return query
+    order, doc_id = after
+    continuation = {"$or": [
+        {"order": {"$gt": order}},
+        {"order": order, "id": {"$gt": doc_id}},
+    ]}
+    return {"$and": [query, continuation]} if query else continuation
+
+
+class ListParams:
+    """Query parameters shared by the paginated list routes"""
+
+    def __init__(self, limit: Optional[int] = None, after: Optional[str] = None, stream: bool = False):
+        self.limit = limit
+        self.after = decode_cursor(after) if after else None
+        self.cursor = after
+        self.stream = stream
+
+    @property
+    def paginated(self) -> bool:
+        return self.limit is not None or self.after is not None
+
+    def cache_key(self) -> tuple:
+        return (self.limit, self.cursor)
+
+
+# Async so FastAPI resolves it on the event loop instead of a threadpool hop
+async def list_params(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    stream: bool = False,
+) -> ListParams:
+    return ListParams(limit, after, stream)
@@ -0,0 +1,224 @@
+"""
+Opt-in request profiling and slow-request capture.
+ProfilingMiddleware records a timing breakdown for every request slower than
+SLOW_REQUEST_MS: the phases collected by metrics.py (mongo, serialize,
+compress, ...), each Mongo call, time to first byte, and the remainder spent
+in routing, validation and middleware. A fraction of requests
+(PROFILE_SAMPLE_RATE), or any request carrying the admin token in
+X-Profile, is also run under a sampling profiler whose stacks are kept in
+collapsed ("folded") form, ready for flamegraph.pl or speedscope.
+
+The sampler reads the event loop thread's stack from a background thread,
+so under concurrency a profile also shows the other requests the loop was
+serving meanwhile; idle samples (the loop waiting in select) are time
+spent awaiting I/O such as Mongo.
+"""
+
+import random
+import secrets
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+from metrics import request_phases, request_trace
+
+MAX_STACK_DEPTH = 64
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_name}"
+
+
+def collapse(frame) -> str:
+    """Folded stack from the outermost frame to the innermost"""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """Samples one thread's stack every interval while any profile is open"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._profiles: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._target: Optional[int] = None
+
+    def begin(self, profile_id: str) -> None:
+        """Open a profile on the calling thread (the event loop)"""
+        with self._lock:
+            self._profiles[profile_id] = Counter()
+            self._target = threading.get_ident()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+
+    def end(self, profile_id: str) -> Counter:
+        with self._lock:
+            return self._profiles.pop(profile_id, Counter())
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._profiles:
+                    self._thread = None
+                    return
+                frame = sys._current_frames().get(self._target)
+                if frame is not None:
+                    stack = collapse(frame)
+                    for stacks in self._profiles.values():
+                        stacks[stack] += 1
+            time.sleep(self.interval)
+
+
+class RequestCapture:
+    __slots__ = ("id", "at", "method", "path", "query", "route", "status", "duration",
+                 "first_byte", "phases", "mongo", "stacks", "reason")
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "at": self.at,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "durationMs": round(self.duration * 1000, 3),
+            "reason": self.reason,
+            "profiled": self.stacks is not None,
+        }
+
+    def detail(self) -> Dict[str, Any]:
+        phases = {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()}
+        # Time not attributed to a phase: routing, validation and middleware
+        phases["other"] = round(max(0.0, self.duration - sum(self.phases.values())) * 1000, 3)
+        return {
+            **self.summary(),
+            "query": self.query,
+            "firstByteMs": round(self.first_byte * 1000, 3) if self.first_byte is not None else None,
+            "phasesMs": phases,
+            "mongo": [{"operation": name, "ms": round(seconds * 1000, 3)} for name, seconds in self.mongo],
+            "samples": sum(self.stacks.values()) if self.stacks is not None else 0,
+        }
+
+    def folded(self) -> str:
+        """Collapsed stacks, one "frame;frame;frame count" line each"""
+        if not self.stacks:
+            return ""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+
+class RequestProfiler:
+    def __init__(
+        self,
+        slow_threshold: float = 0.5,
+        sample_rate: float = 0.0,
+        token: Optional[str] = None,
+        max_captures: int = 100,
+        interval: float = 0.005,
+        ignore_prefixes: tuple = ("/api/admin", "/metrics"),
+    ):
+        self.slow_threshold = slow_threshold
+        self.sample_rate = sample_rate
+        self.token = token or None
+        self.ignore_prefixes = ignore_prefixes
+        self.sampler = StackSampler(interval)
+        self._captures: Deque[RequestCapture] = deque(maxlen=max_captures)
+        self.profiled = 0
+        self.slow = 0
+
+    def should_profile(self, profile_header: Optional[str]) -> bool:
+        if profile_header is not None and self.token is not None:
+            if secrets.compare_digest(profile_header, self.token):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def record(self, capture: RequestCapture) -> None:
+        self._captures.append(capture)
+
+    def captures(self) -> List[RequestCapture]:
+        return list(reversed(self._captures))
+
+    def capture(self, capture_id: str) -> Optional[RequestCapture]:
+        for capture in self._captures:
+            if capture.id == capture_id:
+                return capture
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "slowThresholdMs": self.slow_threshold * 1000,
+            "sampleRate": self.sample_rate,
+            "headerEnabled": self.token is not None,
+            "captures": len(self._captures),
+            "profiled": self.profiled,
+            "slow": self.slow,
+        }
+
+
+class ProfilingMiddleware:
+    """Sits just inside MetricsMiddleware so the request's phases are available"""
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.profiler.ignore_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        profile_header = None
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                profile_header = value.decode("latin-1")
+                break
+        profile_id = uuid.uuid4().hex[:12]
+        profiled = self.profiler.should_profile(profile_header)
+        if profiled:
+            self.profiler.sampler.begin(profile_id)
+
+        started = time.perf_counter()
+        status = 500
+        first_byte = None
+
+        async def send_wrapper(message):
+            nonlocal status, first_byte
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                first_byte = time.perf_counter() - started
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            stacks = self.profiler.sampler.end(profile_id) if profiled else None
+            slow = duration >= self.profiler.slow_threshold
+            if profiled or slow:
+                capture = RequestCapture()
+                capture.id = profile_id
+                capture.at = time.time()
+                capture.method = scope.get("method", "")
+                capture.path = scope["path"]
+                capture.query = scope.get("query_string", b"").decode("latin-1")
+                capture.route = getattr(scope.get("route"), "path", None) or "unmatched"
+                capture.status = status
+                capture.duration = duration
+                capture.first_byte = first_byte
+                capture.phases = dict(request_phases() or {})
+                capture.mongo = list(request_trace() or [])
+                capture.stacks = stacks
+                capture.reason = "slow" if slow else "sampled"
+                self.profiler.record(capture)
+                self.profiler.profiled += profiled
+                self.profiler.slow += slow
@@ -0,0 +1,102 @@
+"""
+Per-client token-bucket rate limiting.
+Each client IP owns a bucket holding up to `burst` tokens that refills at
+`rate` tokens per second; a request spends one token and is answered 429 with
+Retry-After when the bucket is empty, before it reaches the router or Mongo.
+Buckets live in a bounded LRU, so a flood of distinct addresses cannot grow
+memory without limit.
+
+Behind proxies the client is identified by X-Forwarded-For, counting
+`trusted_proxies` entries from the right: each proxy appends the address it
+received the request from, and everything to the left of those is whatever
+the client chose to send.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from snapshots import encode_json
+
+REJECTED_BODY = encode_json({"success": False, "message": "Too many requests"})
+
+
+class TokenBuckets:
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+
+    def take(self, client: str, now: Optional[float] = None) -> float:
+        """Spend a token; returns 0 when allowed, else seconds until one is available"""
+        now = time.monotonic() if now is None else now
+        tokens, updated = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+            self.allowed += 1
+        else:
+            wait = (1 - tokens) / self.rate
+            self.rejected += 1
+
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RateLimitMiddleware:
+    """Rejects requests to path_prefix from clients that exhausted their bucket"""
+
+    def __init__(self, app, buckets: TokenBuckets, path_prefix: str = "/api", trusted_proxies: int = 0):
+        self.app = app
+        self.buckets = buckets
+        self.path_prefix = path_prefix
+        self.trusted_proxies = trusted_proxies
+
+    def client_ip(self, scope) -> str:
+        if self.trusted_proxies:
+            # Repeated headers are one list, in order
+            forwarded = [
+                address.strip()
+                for name, value in scope["headers"] if name == b"x-forwarded-for"
+                for address in value.decode("latin-1").split(",") if address.strip()
+            ]
+            if forwarded:
+                return forwarded[-min(self.trusted_proxies, len(forwarded))]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or not scope["path"].startswith(self.path_prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        wait = self.buckets.take(self.client_ip(scope))
+        if not wait:
+            await self.app(scope, receive, send)
+            return
+
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(REJECTED_BODY)).encode("latin-1")),
+                (b"retry-after", str(math.ceil(wait)).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": REJECTED_BODY})
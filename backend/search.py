@@ -0,0 +1,173 @@
+"""
+In-memory full-text search over projects, achievements and creative works.
+Documents are tokenized into an inverted index (term -> document -> weighted
+term frequency) and ranked with BM25. The last query token also matches as a
+prefix so the index can drive search-as-you-type. The index is built at
+startup and updated per document when a collection changes.
+"""
+
+import bisect
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Searchable fields per collection with their term-frequency weight
+SEARCH_FIELDS = {
+    "projects": {"title": 3, "technologies": 2, "type": 2, "description": 1},
+    "achievements": {"title": 3, "description": 1},
+    "creative_works": {"title": 3, "type": 2, "preview": 1, "fullContent": 1},
+}
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the to with".split()
+)
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+MAX_PREFIX_EXPANSIONS = 32
+
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _field_text(value) -> str:
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(item) for item in value)
+    return str(value) if value is not None else ""
+
+
+class SearchIndex:
+    def __init__(self, fields: Dict[str, Dict[str, int]] = SEARCH_FIELDS):
+        self.fields = fields
+        self._postings: Dict[str, Dict[Tuple[str, str], float]] = {}
+        self._terms: List[str] = []  # sorted, for prefix lookups
+        self._doc_terms: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._doc_lengths: Dict[Tuple[str, str], float] = {}
+        self._doc_info: Dict[Tuple[str, str], dict] = {}
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def add(self, collection: str, document: dict) -> None:
+        """Index (or re-index) one document"""
+        key = (collection, str(document["id"]))
+        self.remove(*key)
+
+        weights = self.fields[collection]
+        frequencies: Dict[str, float] = {}
+        for field, weight in weights.items():
+            for token in tokenize(_field_text(document.get(field))):
+                frequencies[token] = frequencies.get(token, 0.0) + weight
+        length = sum(frequencies.values())
+
+        self._doc_terms[key] = frequencies
+        self._doc_lengths[key] = length
+        self._total_length += length
+        self._doc_info[key] = {
+            "collection": collection,
+            "id": key[1],
+            "title": document.get("title"),
+            "type": document.get("type"),
+            "signature": self._signature(collection, document),
+        }
+        for term, frequency in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._terms, term)
+            postings[key] = frequency
+
+    def remove(self, collection: str, doc_id: str) -> None:
+        key = (collection, str(doc_id))
+        frequencies = self._doc_terms.pop(key, None)
+        if frequencies is None:
+            return
+        self._total_length -= self._doc_lengths.pop(key)
+        self._doc_info.pop(key, None)
+        for term in frequencies:
+            postings = self._postings[term]
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect.bisect_left(self._terms, term)]
+
+    def replace_collection(self, collection: str, documents: Iterable[dict]) -> Dict[str, int]:
+        """Bring one collection's entries in line with its current documents"""
+        counts = {"indexed": 0, "removed": 0, "unchanged": 0}
+        seen = set()
+        for document in documents:
+            doc_id = str(document["id"])
+            seen.add(doc_id)
+            key = (collection, doc_id)
+            if key in self._doc_info and self._doc_info[key]["signature"] == self._signature(collection, document):
+                counts["unchanged"] += 1
+                continue
+            self.add(collection, document)
+            counts["indexed"] += 1
+
+        stale = [key for key in self._doc_terms if key[0] == collection and key[1] not in seen]
+        for key in stale:
+            self.remove(*key)
+        counts["removed"] = len(stale)
+        return counts
+
+    def _signature(self, collection: str, document: dict) -> int:
+        return hash(tuple(_field_text(document.get(field)) for field in self.fields[collection]))
+
+    def _expand(self, token: str, prefix: bool) -> List[str]:
+        if not prefix:
+            return [token] if token in self._postings else []
+        start = bisect.bisect_left(self._terms, token)
+        matches = []
+        for term in self._terms[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            matches.append(term)
+        return matches
+
+    def search(self, query: str, limit: int = 10, collections: Optional[Iterable[str]] = None) -> List[dict]:
+        """BM25-ranked hits; the last query token is matched as a prefix"""
+        tokens = tokenize(query)
+        if not tokens or not self._doc_terms:
+            return []
+
+        allowed = set(collections) if collections else None
+        total_docs = len(self._doc_terms)
+        average_length = self._total_length / total_docs or 1.0
+        scores: Dict[Tuple[str, str], float] = {}
+
+        for position, token in enumerate(tokens):
+            is_last = position == len(tokens) - 1
+            token_scores: Dict[Tuple[str, str], float] = {}
+            for term in self._expand(token, prefix=is_last):
+                postings = self._postings[term]
+                idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, frequency in postings.items():
+                    if allowed is not None and key[0] not in allowed:
+                        continue
+                    norm = K1 * (1 - B + B * self._doc_lengths[key] / average_length)
+                    score = idf * frequency * (K1 + 1) / (frequency + norm)
+                    # A prefix expanding to several terms counts its best match once
+                    if score > token_scores.get(key, 0.0):
+                        token_scores[key] = score
+            for key, score in token_scores.items():
+                scores[key] = scores.get(key, 0.0) + score
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        hits = []
+        for key, score in ranked:
+            info = self._doc_info[key]
+            hits.append({
+                "collection": info["collection"],
+                "id": info["id"],
+                "title": info["title"],
+                "type": info["type"],
+                "score": round(score, 4),
+            })
+        return hits
+
+    def stats(self) -> Dict[str, int]:
+        return {"documents": len(self._doc_terms), "terms": len(self._postings)}
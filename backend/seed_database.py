@@ -1,20 +1,17 @@
+import argparse
 import asyncio
+import copy
 import sys
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
-from pathlib import Path
 
-# Add parent directory to path to import from frontend
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'frontend', 'src', 'components'))
+from pymongo import DeleteMany, ReplaceOne
 
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / 'backend' / '.env')
+from database import close_database, connect_database
+from indexes import ensure_collection_indexes, ensure_indexes
+from invalidation import publish_changes
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Add parent directory to path to import from frontend
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'frontend', 'src', 'components'))
 
 # Portfolio data to seed
 portfolio_data = {
@@ -290,55 +287,112 @@ Forever."""
     ]
 }
 
-async def seed_database():
+# Field identifying each document of a collection; profile is a singleton
+SEED_KEYS = {
+    "profile": None,
+    "education": "id",
+    "skills": "category",
+    "projects": "id",
+    "achievements": "id",
+    "creative_works": "id",
+    "photography": "id",
+}
+
+def seed_documents(collection):
+    documents = portfolio_data[collection]
+    if isinstance(documents, dict):
+        documents = [documents]
+    return [copy.deepcopy(document) for document in documents]
+
+def diff_collection(collection, stored, desired):
+    """Plan the bulk operations that turn the stored documents into the desired ones"""
+    key = SEED_KEYS[collection]
+    if key is None:
+        current = stored[0] if stored else None
+        if current == desired[0]:
+            return [], {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 1}
+        counts = {"inserted": int(current is None), "updated": int(current is not None), "deleted": 0, "unchanged": 0}
+        return [ReplaceOne({}, desired[0], upsert=True)], counts
+
+    stored_by_key = {document.get(key): document for document in stored}
+    desired_keys = set()
+    operations = []
+    counts = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    for document in desired:
+        desired_keys.add(document[key])
+        current = stored_by_key.get(document[key])
+        if current == document:
+            counts["unchanged"] += 1
+            continue
+        counts["inserted" if current is None else "updated"] += 1
+        operations.append(ReplaceOne({key: document[key]}, document, upsert=True))
+
+    stale = [value for value in stored_by_key if value not in desired_keys]
+    if stale:
+        counts["deleted"] = len(stale)
+        operations.append(DeleteMany({key: {"$in": stale}}))
+    return operations, counts
+
+async def sync_collection(db, collection, dry_run=False):
+    """Upsert changed documents and delete stale ones in a single bulk_write"""
+    stored = await db[collection].find({}, {"_id": 0}).to_list(None)
+    operations, counts = diff_collection(collection, stored, seed_documents(collection))
+    if operations and not dry_run:
+        await db[collection].bulk_write(operations, ordered=False)
+    return counts
+
+async def swap_collection(db, collection):
+    """Load a shadow collection, index it, then rename it over the live one"""
+    shadow = f"{collection}__shadow"
+    await db[shadow].drop()
+    documents = seed_documents(collection)
+    await db[shadow].insert_many(documents)
+    await ensure_collection_indexes(db, collection, target=shadow)
+    # renameCollection with dropTarget replaces the live collection atomically
+    await db[shadow].rename(collection, dropTarget=True)
+    return {"inserted": len(documents), "updated": 0, "deleted": 0, "unchanged": 0}
+
+async def seed_database(shadow=False, dry_run=False):
     print("🌱 Starting database seeding...")
+    db = connect_database()
     
     try:
-        # Clear existing data
-        await db.profile.delete_many({})
-        await db.education.delete_many({})
-        await db.skills.delete_many({})
-        await db.projects.delete_many({})
-        await db.achievements.delete_many({})
-        await db.creative_works.delete_many({})
-        await db.photography.delete_many({})
-        
-        print("🗑️  Cleared existing data")
-        
-        # Insert profile
-        await db.profile.insert_one(portfolio_data["profile"])
-        print("✅ Profile seeded")
-        
-        # Insert education
-        await db.education.insert_many(portfolio_data["education"])
-        print("✅ Education seeded")
-        
-        # Insert skills
-        await db.skills.insert_many(portfolio_data["skills"])
-        print("✅ Skills seeded")
+        collections = list(SEED_KEYS)
+        if shadow and not dry_run:
+            results = await asyncio.gather(*(swap_collection(db, name) for name in collections))
+        else:
+            results = await asyncio.gather(*(sync_collection(db, name, dry_run) for name in collections))
         
-        # Insert projects
-        await db.projects.insert_many(portfolio_data["projects"])
-        print("✅ Projects seeded")
+        for name, counts in zip(collections, results):
+            print(f"✅ {name}: {counts['inserted']} inserted, {counts['updated']} updated, "
+                  f"{counts['deleted']} deleted, {counts['unchanged']} unchanged")
         
-        # Insert achievements
-        await db.achievements.insert_many(portfolio_data["achievements"])
-        print("✅ Achievements seeded")
+        if dry_run:
+            print("🔍 Dry run, no changes written")
+            return
         
-        # Insert creative works
-        await db.creative_works.insert_many(portfolio_data["creative_works"])
-        print("✅ Creative works seeded")
+        # Ensure indexes for the route queries
+        await ensure_indexes(db)
+        print("✅ Indexes ensured")
         
-        # Insert photography
-        await db.photography.insert_many(portfolio_data["photography"])
-        print("✅ Photography seeded")
+        # Tell running API workers to drop what they cached from these collections
+        changed = [name for name, counts in zip(collections, results)
+                   if counts["inserted"] or counts["updated"] or counts["deleted"]]
+        await publish_changes(db, *changed)
+        if changed:
+            print(f"✅ Invalidation published for {', '.join(changed)}")
         
         print("🎉 Database seeding completed successfully!")
         
     except Exception as e:
         print(f"❌ Error seeding database: {e}")
     finally:
-        client.close()
+        close_database()
 
 if __name__ == "__main__":
-    asyncio.run(seed_database())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Seed the portfolio collections")
+    parser.add_argument("--shadow", action="store_true",
+                        help="load into shadow collections and rename them over the live ones")
+    parser.add_argument("--dry-run", action="store_true", help="report the changes without writing them")
+    args = parser.parse_args()
+    asyncio.run(seed_database(shadow=args.shadow, dry_run=args.dry_run))
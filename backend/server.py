@@ -1,26 +1,152 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
+from contextlib import asynccontextmanager
+import asyncio
+import json
 import os
 import logging
+import secrets
+import time
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional, Any, Union
+from pydantic import BaseModel, Field, create_model
+from typing import Dict, Generic, List, Optional, Any, Tuple, TypeVar, Union, get_args
 import uuid
 from datetime import datetime
 
+from analytics import ANALYTICS_COLLECTION, EVENTS, KINDS, Tracker
+from cache import ResponseCache
+from compression import CompressionMiddleware
+from database import close_database, connect_database, db, pool_stats
+from events import EventBroker, describe_write
+from facets import ProjectFacets
+from images import IMMUTABLE_CACHE_CONTROL, ImageProxy
+from indexes import ensure_indexes
+from invalidation import ChangeWatcher
+from metrics import Collector, MetricsMiddleware, mongo_timed, phase, register, render
+from search import SEARCH_FIELDS, SearchIndex
+from profiling import ProfilingMiddleware, RequestProfiler
+from ratelimit import RateLimitMiddleware, TokenBuckets
+from pagination import MAX_PAGE_SIZE, ListParams, Page, encode_cursor, list_params
+from snapshots import FastJSONResponse, Snapshot, encode_json
+from storage import create_storage
+from writes import DELETE, REPLACE, UPDATE, QueueFull, Write, WriteQueue
+
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Read-through cache in front of the Mongo readers, invalidated on writes
+cache = ResponseCache(
+    max_entries=int(os.environ.get('CACHE_MAX_ENTRIES', 256)),
+    ttl=float(os.environ.get('CACHE_TTL_SECONDS', 300)),
+)
+
+# Resized image variants are cached on disk, bounded by IMAGE_CACHE_MAX_BYTES
+image_proxy = ImageProxy(
+    cache_dir=Path(os.environ.get('IMAGE_CACHE_DIR', ROOT_DIR / '.image_cache')),
+    max_bytes=int(os.environ.get('IMAGE_CACHE_MAX_BYTES', 256 * 1024 * 1024)),
+)
+
+# Per-client token buckets in front of the API; RATE_LIMIT_PER_SECOND=0 disables
+# them. Behind a load balancer, set RATE_LIMIT_TRUST_FORWARDED so clients are
+# told apart by X-Forwarded-For instead of the balancer's address, and
+# RATE_LIMIT_TRUSTED_PROXIES to the number of proxies that append to it.
+rate_limits = TokenBuckets(
+    rate=float(os.environ.get('RATE_LIMIT_PER_SECOND', 20)),
+    burst=float(os.environ.get('RATE_LIMIT_BURST', 60)),
+    max_clients=int(os.environ.get('RATE_LIMIT_MAX_CLIENTS', 10000)),
+)
+
+# Slow-request capture and opt-in sampling profiles, viewed under /api/admin.
+# ADMIN_TOKEN guards the admin routes and, sent as X-Profile, profiles a request.
+profiler = RequestProfiler(
+    slow_threshold=float(os.environ.get('SLOW_REQUEST_MS', 500)) / 1000,
+    sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),
+    token=os.environ.get('ADMIN_TOKEN'),
+    max_captures=int(os.environ.get('SLOW_REQUEST_CAPTURES', 100)),
+    interval=float(os.environ.get('PROFILE_INTERVAL_MS', 5)) / 1000,
+    # Event streams stay open for minutes by design
+    ignore_prefixes=("/api/admin", "/api/events", "/metrics"),
+)
+
+# Admin and write routes require the X-Admin-Token header; without ADMIN_TOKEN
+# they are hidden
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if profiler.token is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, profiler.token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+# Where reads are served from: "mongo" queries MongoDB per read, "memory"
+# holds every collection in process and reloads one when it changes.
+# STORAGE_SNAPSHOT_PATH lets the memory backend restart from a file.
+storage = create_storage(
+    os.environ.get('STORAGE_BACKEND', 'mongo'),
+    db,
+    snapshot_path=os.environ.get('STORAGE_SNAPSHOT_PATH') or None,
+)
+
+# Collections whose documents carry an image served through /api/images
+IMAGE_COLLECTIONS = ("projects", "photography")
+
+# Documents fetched per round-trip when streaming NDJSON
+STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', 100))
+
+# Seconds spent in each lifespan startup step, reported by
+# `backend_test.py --startup-report` and GET /api/cache/stats
+startup_timings: Dict[str, float] = {}
+
+async def startup_step(name: str, step, error_message: str):
+    """Await one startup step, timing it and logging (not raising) its failure"""
+    started = time.perf_counter()
+    try:
+        await step
+    except Exception as e:
+        logging.error(f"{error_message}: {e}")
+    startup_timings[name] = time.perf_counter() - started
+
+# MongoDB connection lifecycle (the client lives in database.py)
+# The client is created here rather than at import, and startup steps that
+# only wait on Mongo run concurrently. STARTUP_PREWARM loads the full
+# /api/portfolio snapshot, and with it every reader, before the first request.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    startup_timings.clear()
+    connect_database()
+    # Server selection and the first pooled connection happen here, not in the first request
+    await startup_step("connect", db.command("ping"), "Error reaching MongoDB")
+    write_queue.start()
+    analytics.start()
+    event_broker.start()
+    # The watcher starts before anything is cached so no change is missed
+    await asyncio.gather(
+        startup_step("indexes", ensure_indexes(db), "Error ensuring indexes"),
+        startup_step("watcher", change_watcher.start(), "Error starting change watcher"),
+    )
+    await startup_step("storage", storage.start(), f"Error loading {storage.name} storage")
+    if os.environ.get('STARTUP_PREWARM', 'true').lower() in ('1', 'true', 'yes'):
+        await startup_step("prewarm", portfolio_snapshot(list(PORTFOLIO_SECTIONS)), "Error prewarming portfolio")
+    # All reuse the readers the prewarm just cached
+    await asyncio.gather(
+        startup_step("searchIndex", refresh_search_index(*SEARCH_FIELDS), "Error building search index"),
+        startup_step("facets", refresh_project_facets(), "Error building project facets"),
+        startup_step("trackedItems", refresh_tracked_items(*KINDS.values()), "Error loading tracked items"),
+    )
+    logger.info(f"Search index: {search_index.stats()}, project facets: {project_facets.stats()}")
+    startup_timings["total"] = time.perf_counter() - started
+    logger.info(f"Startup finished in {startup_timings['total'] * 1000:.1f} ms")
+    yield
+    await event_broker.stop()
+    await write_queue.stop()
+    await analytics.stop()
+    await change_watcher.stop()
+    close_database()
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -82,112 +208,902 @@ class Photography(BaseModel):
     description: str
     order: int = 0
 
+# Response models
+# Stored documents carry bookkeeping fields (timestamps, proxied image URLs)
+# next to the input fields. Routes declare their envelope so dict results are
+# validated and serialized by pydantic-core rather than jsonable_encoder, and
+# exclude unset fields so documents keep their stored shape. Snapshot-backed
+# routes return prebuilt bytes and use the model for the schema only.
+T = TypeVar("T")
+
+class ApiResponse(BaseModel, Generic[T]):
+    success: bool
+    data: Optional[T] = None
+    message: Optional[str] = None
+
+class ListResponse(ApiResponse[List[T]], Generic[T]):
+    next: Optional[str] = None
+
+class Stored(BaseModel):
+    createdAt: Optional[datetime] = None
+    updatedAt: Optional[datetime] = None
+
+class ProxiedImage(BaseModel):
+    imageId: Optional[str] = None
+    imageSrc: Optional[str] = None
+    imageSrcset: Optional[str] = None
+
+class ProfileOut(Stored, Profile):
+    pass
+
+class EducationOut(Stored, Education):
+    pass
+
+class ProjectOut(Stored, ProxiedImage, Project):
+    pass
+
+class AchievementOut(Stored, Achievement):
+    pass
+
+class CreativeWorkOut(Stored, CreativeWork):
+    # Left out of summaries
+    fullContent: Optional[str] = None
+
+class PhotographyOut(Stored, ProxiedImage, Photography):
+    pass
+
+class PortfolioOut(BaseModel):
+    profile: Optional[ProfileOut] = None
+    education: Optional[List[EducationOut]] = None
+    skills: Optional[Dict[str, List[str]]] = None
+    projects: Optional[List[ProjectOut]] = None
+    achievements: Optional[List[AchievementOut]] = None
+    creativeWorks: Optional[List[CreativeWorkOut]] = None
+    photography: Optional[List[PhotographyOut]] = None
+
+class FacetResponse(ListResponse[ProjectOut]):
+    facets: Optional[Dict[str, Dict[str, int]]] = None
+    total: Optional[int] = None
+
+class SearchHit(BaseModel):
+    collection: str
+    id: str
+    title: Optional[str] = None
+    type: Optional[str] = None
+    score: float
+
+class ItemStats(BaseModel):
+    id: str
+    views: int
+    clicks: int
+    visitors: int
+
+class WriteJob(BaseModel):
+    jobId: str
+    status: str
+    collections: List[str]
+    error: Optional[str] = None
+    createdAt: float
+    completedAt: Optional[float] = None
+    id: Optional[str] = None
+    ids: Optional[List[str]] = None
+
+# Field selection
+# ?fields= is checked against the model and handed to the storage backend as a
+# projection, so only the requested fields are read and serialized.
+def parse_fields(fields: Optional[str], model) -> Optional[Tuple[str, ...]]:
+    if not fields:
+        return None
+
+    # Sorted so every spelling of the same selection shares one cache entry
+    requested = tuple(sorted({name.strip() for name in fields.split(",") if name.strip()}))
+    unknown = [name for name in requested if name not in model.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    return requested or None
+
+# Data access helpers
+# Each reader returns plain, JSON-ready data and lets errors propagate so the
+# single-collection routes and the aggregated /portfolio route share one query.
+# Reads go through the storage backend (storage.py) rather than db directly.
+# Readers are cached per arguments and tagged with the collection they read;
+# the backend times its own queries (Mongo metrics or the "storage" phase);
+# every write path must call writes_committed(<collection>) once it commits.
+@cache.cached("profile")
+async def fetch_profile(fields: Optional[Tuple[str, ...]] = None):
+    return await storage.find_one("profile", {}, fields)
+
+@cache.cached("education")
+async def fetch_education(fields: Optional[Tuple[str, ...]] = None):
+    return await storage.find("education", fields=fields)
+
+@cache.cached("skills")
+async def fetch_skills():
+    skills_list = await storage.find("skills", fields=("category", "items"), sort=False)
+    skills_dict = {}
+    for skill in skills_list:
+        skills_dict[skill['category']] = skill['items']
+    return skills_dict
+
+def projects_query(project_type: Optional[str] = None) -> dict:
+    query = {}
+    if project_type and project_type != "All":
+        query["type"] = project_type
+    return query
+
+@cache.cached("projects")
+async def fetch_projects(project_type: Optional[str] = None, fields: Optional[Tuple[str, ...]] = None):
+    query = projects_query(project_type)
+    projects = await storage.find("projects", query, fields)
+    return [image_proxy.register(project) for project in projects]
+
+@cache.cached("achievements")
+async def fetch_achievements(fields: Optional[Tuple[str, ...]] = None):
+    return await storage.find("achievements", fields=fields)
+
+# Summary rows leave out fullContent; the body is fetched per work on demand
+@cache.cached("creative_works")
+async def fetch_creative_works(fields: Optional[Tuple[str, ...]] = None, summary: bool = False):
+    exclude = ("fullContent",) if summary else ()
+    return await storage.find("creative_works", fields=fields, exclude=exclude, sort=False)
+
+@cache.cached("creative_works")
+async def fetch_creative_work(work_id: str):
+    return await storage.find_one("creative_works", {"id": work_id})
+
+@cache.cached("photography")
+async def fetch_photography(fields: Optional[Tuple[str, ...]] = None):
+    photos = await storage.find("photography", fields=fields)
+    return [image_proxy.register(photo) for photo in photos]
+
+# Paginated and streamed reads over the ordered collections
+# Pages are keyset ranges on (order, id) so each request touches at most
+# limit + 1 documents; streams hand documents to the socket as the cursor
+# yields them, one JSON object per line.
+async def fetch_page(collection: str, query: dict, fields: Optional[Tuple[str, ...]], params: ListParams) -> Page:
+    limit = params.limit or MAX_PAGE_SIZE
+    if fields:
+        # The cursor is built from order and id, so keep them in the projection
+        fields = tuple(dict.fromkeys(fields + ("order", "id")))
+
+    documents = await storage.find_page(collection, query, fields, params.after, limit + 1)
+    if collection in IMAGE_COLLECTIONS:
+        documents = [image_proxy.register(document) for document in documents]
+
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1])
+    return Page(documents, next_cursor)
+
+def stream_documents(collection: str, query: dict, fields: Optional[Tuple[str, ...]], params: ListParams) -> StreamingResponse:
+    documents = storage.iterate(collection, query, fields, params.after, params.limit, STREAM_BATCH_SIZE)
+
+    async def lines():
+        try:
+            async for document in documents:
+                if collection in IMAGE_COLLECTIONS:
+                    image_proxy.register(document)
+                yield encode_json(document) + b"\n"
+        except Exception as e:
+            logging.error(f"Error streaming {collection}: {e}")
+        finally:
+            await documents.aclose()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+# In-memory full-text index over the searchable collections
+search_index = SearchIndex()
+
+SEARCH_LOADERS = {
+    "projects": fetch_projects,
+    "achievements": fetch_achievements,
+    "creative_works": fetch_creative_works,
+}
+
+async def refresh_search_index(*collections):
+    for collection in collections:
+        documents = await SEARCH_LOADERS[collection]()
+        search_index.replace_collection(collection, documents)
+
+# Type / technology / year bitmaps over the projects for faceted filtering
+project_facets = ProjectFacets()
+
+async def refresh_project_facets():
+    project_facets.rebuild(await fetch_projects())
+
+def parse_values(values: Optional[str]) -> Optional[List[str]]:
+    """Comma-separated filter values, or None when the filter is not applied"""
+    if values is None:
+        return None
+    return list(dict.fromkeys(value.strip() for value in values.split(",") if value.strip())) or None
+
+# Write hook
+# Reloads the storage backend's copy of the changed collections, drops cached
+# readers and snapshots for them and brings derived in-memory indexes up to
+# date in this worker. Local writes go through
+# writes_committed() below, which also notifies the other workers.
+async def collections_changed(*collections):
+    try:
+        await storage.refresh(*collections)
+    except Exception as e:
+        logging.error(f"Error reloading {', '.join(collections)} into {storage.name} storage: {e}")
+    cache.invalidate(*collections)
+    searchable = [collection for collection in collections if collection in SEARCH_FIELDS]
+    if searchable:
+        await refresh_search_index(*searchable)
+    if "projects" in collections:
+        await refresh_project_facets()
+    await refresh_tracked_items(*collections)
+
+# Sections served by GET /api/portfolio, keyed the way the frontend names them,
+# mapped to the collection they read and the reader that loads them.
+# Creative works are listed as summaries; see GET /api/creative-works/{id}.
+PORTFOLIO_SECTIONS = {
+    "profile": ("profile", fetch_profile),
+    "education": ("education", fetch_education),
+    "skills": ("skills", fetch_skills),
+    "projects": ("projects", fetch_projects),
+    "achievements": ("achievements", fetch_achievements),
+    "creativeWorks": ("creative_works", lambda: fetch_creative_works(summary=True)),
+    "photography": ("photography", fetch_photography),
+}
+
+def parse_sections(sections: Optional[str]) -> List[str]:
+    if not sections:
+        return list(PORTFOLIO_SECTIONS)
+
+    requested = [name.strip() for name in sections.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in PORTFOLIO_SECTIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown sections: {', '.join(unknown)}"
+        )
+    # Canonical order, so every spelling of the same selection shares one cache entry
+    return [name for name in PORTFOLIO_SECTIONS if name in requested]
+
+# Live updates streamed from GET /api/events: each write this worker commits
+# becomes a "change" event, and collections other processes changed become a
+# "reload" event naming them.
+event_broker = EventBroker(
+    buffer_size=int(os.environ.get('EVENTS_BUFFER_SIZE', 64)),
+    heartbeat_interval=float(os.environ.get('EVENTS_HEARTBEAT_SECONDS', 15)),
+    max_clients=int(os.environ.get('EVENTS_MAX_CLIENTS', 10000)),
+    max_age=float(os.environ.get('EVENTS_MAX_AGE_SECONDS', 300)),
+)
+
+def publish_writes(writes: List[Write]):
+    for write in writes:
+        event_broker.publish("change", describe_write(write))
+
+async def collections_changed_elsewhere(*collections):
+    await collections_changed(*collections)
+    event_broker.publish("reload", {"collections": list(collections)})
+
+# Other workers (and seed_database.py) announce their writes through a change
+# stream or the cache_versions counters; this worker then runs the same hook.
+# CACHE_INVALIDATION: auto (change stream, else polling), changestream, poll, off
+change_watcher = ChangeWatcher(
+    db,
+    collections={collection for collection, _ in PORTFOLIO_SECTIONS.values()},
+    on_change=collections_changed_elsewhere,
+    mode=os.environ.get('CACHE_INVALIDATION', 'auto'),
+    poll_interval=float(os.environ.get('CACHE_POLL_INTERVAL_SECONDS', 2)),
+)
+
+async def writes_committed(*collections):
+    await collections_changed(*collections)
+    await change_watcher.publish(*collections)
+
+# Writes are accepted into a bounded queue and flushed in background batches,
+# coalescing repeated saves of the same document; writes_committed() runs
+# after every flush, then publish_writes() streams what was written.
+write_queue = WriteQueue(
+    db,
+    on_commit=writes_committed,
+    max_pending=int(os.environ.get('WRITE_QUEUE_MAX_PENDING', 1000)),
+    batch_size=int(os.environ.get('WRITE_BATCH_SIZE', 100)),
+    flush_interval=float(os.environ.get('WRITE_FLUSH_INTERVAL_MS', 50)) / 1000,
+    on_written=publish_writes,
+    local_changes=change_watcher,
+    # Change events list only the fields a replace actually changed
+    capture_previous=True,
+)
+
+def queue_writes(*writes: Write, **extra) -> dict:
+    """Submit writes as one job and describe it for the 202 response"""
+    try:
+        job = write_queue.submit(*writes)
+    except QueueFull as e:
+        logging.warning(f"Rejecting write: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Too many pending writes, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    return {"success": True, "message": "Write queued", "data": {**job.to_dict(), **extra}}
+
+# View/click analytics
+# POST /api/track only bumps in-memory counters; the tracker flushes them to
+# the analytics collection every ANALYTICS_FLUSH_INTERVAL_SECONDS and drops
+# this worker's cached rankings. Other workers pick up the new counts when
+# their cached rankings expire (CACHE_TTL_SECONDS).
+analytics = Tracker(
+    db,
+    flush_interval=float(os.environ.get('ANALYTICS_FLUSH_INTERVAL_SECONDS', 10)),
+    max_keys=int(os.environ.get('ANALYTICS_MAX_KEYS', 10000)),
+    on_flush=lambda: cache.invalidate(ANALYTICS_COLLECTION),
+)
+
+# Days of analytics behind GET /api/stats and GET /api/projects?sort=views
+ANALYTICS_RANK_DAYS = int(os.environ.get('ANALYTICS_RANK_DAYS', 30))
+
+# Events accepted in one /api/track body
+MAX_TRACK_EVENTS = 100
+
+TRACKED_LOADERS = {"project": fetch_projects, "photo": fetch_photography}
+
+async def refresh_tracked_items(*collections):
+    """Only ids that exist can be tracked, so junk ids cannot grow the buffer"""
+    for kind, collection in KINDS.items():
+        if collection in collections:
+            analytics.set_items(kind, [document["id"] for document in await TRACKED_LOADERS[kind]()])
+
+@cache.cached(ANALYTICS_COLLECTION)
+@mongo_timed(ANALYTICS_COLLECTION, "find")
+async def fetch_item_stats(kind: str, days: int):
+    return await analytics.item_stats(kind, days)
+
+async def fetch_projects_by_views(project_type: Optional[str] = None, fields: Optional[Tuple[str, ...]] = None):
+    """Projects ranked by views; projects nobody viewed follow in their usual order"""
+    projects, ranking = await asyncio.gather(
+        fetch_projects(project_type, fields), fetch_item_stats("project", ANALYTICS_RANK_DAYS)
+    )
+    rank = {entry["id"]: position for position, entry in enumerate(ranking)}
+    return sorted(projects, key=lambda project: rank.get(project.get("id"), len(rank)))
+
+# Pre-serialized responses
+# Successful GET payloads are encoded once into a Snapshot (JSON bytes + ETag)
+# and cached under the same collection tags as the readers, so a write drops
+# the snapshot and the next read rebuilds it. Canonical keys (no field
+# selection, no page cursor) are precompressed at maximum quality; the rest,
+# which clients can vary freely, at fast settings.
+async def load_snapshot(key: tuple, tags: tuple, loader, canonical: bool = True) -> Snapshot:
+    async def build():
+        data = await loader()
+        with phase("serialize"):
+            if isinstance(data, Page):
+                snapshot = Snapshot({"success": True, "data": data.items, "next": data.next}, encoded={})
+            else:
+                snapshot = Snapshot({"success": True, "data": data}, encoded={})
+        with phase("compress"):
+            await snapshot.precompress(fast=not canonical)
+        return snapshot
+
+    return await cache.get_or_load(("snapshot",) + key, build, tags)
+
+async def serve_snapshot(request: Request, key: tuple, tags: tuple, loader, canonical: bool = True):
+    snapshot = await load_snapshot(key, tags, loader, canonical)
+    return snapshot.to_response(request)
+
+# Full list, keyset page or NDJSON stream depending on the list parameters
+async def serve_list(request: Request, collection: str, query: dict, fields: Optional[Tuple[str, ...]],
+                     params: ListParams, key: tuple, loader):
+    if params.stream:
+        return stream_documents(collection, query, fields, params)
+    if params.paginated:
+        return await serve_snapshot(
+            request, key + params.cache_key(), (collection,),
+            lambda: fetch_page(collection, query, fields, params), canonical=False
+        )
+    return await serve_snapshot(request, key, (collection,), loader, canonical=fields is None)
+
 # API Endpoints
 
-# Profile endpoints
-@api_router.get("/profile")
-async def get_profile():
+# Aggregated portfolio endpoint (one round-trip for the whole page)
+async def portfolio_snapshot(names: List[str], project_type: Optional[str] = None) -> Snapshot:
+    async def load_portfolio():
+        readers = []
+        for name in names:
+            if name == "projects":
+                readers.append(fetch_projects(project_type))
+            else:
+                readers.append(PORTFOLIO_SECTIONS[name][1]())
+
+        results = await asyncio.gather(*readers)
+        return dict(zip(names, results))
+
+    tags = tuple(PORTFOLIO_SECTIONS[name][0] for name in names)
+    canonical = len(names) == len(PORTFOLIO_SECTIONS) and project_type is None
+    return await load_snapshot(("portfolio", tuple(names), project_type), tags, load_portfolio, canonical)
+
+@api_router.get("/portfolio", response_model=ApiResponse[PortfolioOut],
+                response_model_exclude_unset=True)
+async def get_portfolio(request: Request, sections: Optional[str] = None, project_type: Optional[str] = None):
+    names = parse_sections(sections)
     try:
-        profile = await db.profile.find_one()
+        snapshot = await portfolio_snapshot(names, project_type)
+        return snapshot.to_response(request)
+    except Exception as e:
+        logging.error(f"Error fetching portfolio: {e}")
+        return {"success": False, "message": "Failed to fetch portfolio"}
+
+# Profile endpoints
+@api_router.get("/profile", response_model=ApiResponse[ProfileOut],
+                response_model_exclude_unset=True)
+async def get_profile(request: Request, fields: Optional[str] = None):
+    selected = parse_fields(fields, Profile)
+
+    async def load_profile():
+        profile = await fetch_profile(selected)
         if not profile:
             raise HTTPException(status_code=404, detail="Profile not found")
-        
-        # Remove MongoDB _id from response
-        profile.pop('_id', None)
-        return {"success": True, "data": profile}
+        return profile
+
+    try:
+        return await serve_snapshot(request, ("profile", selected), ("profile",), load_profile, selected is None)
     except Exception as e:
         logging.error(f"Error fetching profile: {e}")
         return {"success": False, "message": "Failed to fetch profile"}
 
-@api_router.put("/profile")
+@api_router.put("/profile", status_code=202, dependencies=[Depends(require_admin)],
+                response_model=ApiResponse[WriteJob],
+                response_model_exclude_unset=True)
 async def update_profile(profile: Profile):
-    try:
-        profile_dict = profile.dict()
-        profile_dict['updatedAt'] = datetime.utcnow()
-        
-        result = await db.profile.replace_one({}, profile_dict, upsert=True)
-        return {"success": True, "message": "Profile updated successfully"}
-    except Exception as e:
-        logging.error(f"Error updating profile: {e}")
-        return {"success": False, "message": "Failed to update profile"}
+    profile_dict = profile.dict()
+    profile_dict['updatedAt'] = datetime.utcnow()
+    return queue_writes(Write("profile", {}, REPLACE, profile_dict))
 
 # Education endpoints
-@api_router.get("/education")
-async def get_education():
+@api_router.get("/education", response_model=ListResponse[EducationOut],
+                response_model_exclude_unset=True)
+async def get_education(request: Request, fields: Optional[str] = None, params: ListParams = Depends(list_params)):
+    selected = parse_fields(fields, Education)
     try:
-        education_list = await db.education.find().sort("order", 1).to_list(100)
-        for edu in education_list:
-            edu.pop('_id', None)
-        return {"success": True, "data": education_list}
+        return await serve_list(
+            request, "education", {}, selected, params, ("education", selected),
+            lambda: fetch_education(selected)
+        )
     except Exception as e:
         logging.error(f"Error fetching education: {e}")
         return {"success": False, "message": "Failed to fetch education"}
 
 # Skills endpoints
-@api_router.get("/skills")
-async def get_skills():
-    try:
-        skills_list = await db.skills.find().to_list(100)
-        skills_dict = {}
-        for skill in skills_list:
-            skills_dict[skill['category']] = skill['items']
-        return {"success": True, "data": skills_dict}
+@api_router.get("/skills", response_model=ApiResponse[Dict[str, List[str]]],
+                response_model_exclude_unset=True)
+async def get_skills(request: Request):
+    try:
+        return await serve_snapshot(request, ("skills",), ("skills",), fetch_skills)
     except Exception as e:
         logging.error(f"Error fetching skills: {e}")
         return {"success": False, "message": "Failed to fetch skills"}
 
+@api_router.put("/skills", status_code=202, dependencies=[Depends(require_admin)],
+                response_model=ApiResponse[WriteJob],
+                response_model_exclude_unset=True)
+async def update_skills(skills: Dict[str, List[str]]):
+    if not skills:
+        raise HTTPException(status_code=400, detail="No skill categories given")
+    now = datetime.utcnow()
+    return queue_writes(*(
+        Write("skills", {"category": category}, REPLACE,
+              {"category": category, "items": items, "updatedAt": now})
+        for category, items in skills.items()
+    ))
+
 # Projects endpoints
-@api_router.get("/projects")
-async def get_projects(project_type: Optional[str] = None):
-    try:
-        query = {}
-        if project_type and project_type != "All":
-            query["type"] = project_type
-            
-        projects = await db.projects.find(query).sort("order", 1).to_list(100)
-        for project in projects:
-            project.pop('_id', None)
-        return {"success": True, "data": projects}
+@api_router.get("/projects", response_model=ListResponse[ProjectOut],
+                response_model_exclude_unset=True)
+async def get_projects(request: Request, project_type: Optional[str] = None, fields: Optional[str] = None,
+                       sort: str = Query("order", pattern="^(order|views)$"),
+                       params: ListParams = Depends(list_params)):
+    selected = parse_fields(fields, Project)
+    if sort == "views" and (params.paginated or params.stream):
+        raise HTTPException(
+            status_code=400,
+            detail="sort=views cannot be combined with limit, after or stream"
+        )
+    try:
+        if sort == "views":
+            return await serve_snapshot(
+                request, ("projects", project_type, selected, "views"), ("projects", ANALYTICS_COLLECTION),
+                lambda: fetch_projects_by_views(project_type, selected), selected is None
+            )
+        return await serve_list(
+            request, "projects", projects_query(project_type), selected, params,
+            ("projects", project_type, selected),
+            lambda: fetch_projects(project_type, selected)
+        )
     except Exception as e:
         logging.error(f"Error fetching projects: {e}")
         return {"success": False, "message": "Failed to fetch projects"}
 
+# Faceted project filters, served from the in-memory bitmaps
+# Values are OR-ed within a filter and AND-ed across filters; each facet's
+# counts apply every other filter, so they show what a click would return.
+@api_router.get("/projects/facets", response_model=FacetResponse,
+                response_model_exclude_unset=True)
+async def get_project_facets(
+    technologies: Optional[str] = None,
+    project_type: Optional[str] = Query(None, alias="type"),
+    year_from: Optional[int] = Query(None, ge=1900, le=2100),
+    year_to: Optional[int] = Query(None, ge=1900, le=2100),
+):
+    if year_from is not None and year_to is not None and year_from > year_to:
+        raise HTTPException(status_code=400, detail="year_from must not be after year_to")
+
+    types = parse_values(project_type)
+    if types and "All" in types:
+        types = None
+    years = None
+    if year_from is not None or year_to is not None:
+        years = project_facets.year_values(year_from, year_to)
+
+    try:
+        with phase("facets"):
+            projects, facets = project_facets.query({
+                "type": types,
+                "technologies": parse_values(technologies),
+                "year": years,
+            })
+        return {"success": True, "data": projects, "facets": facets, "total": len(projects)}
+    except Exception as e:
+        logging.error(f"Error filtering projects: {e}")
+        return {"success": False, "message": "Failed to filter projects"}
+
 # Achievements endpoints
-@api_router.get("/achievements")
-async def get_achievements():
+@api_router.get("/achievements", response_model=ListResponse[AchievementOut],
+                response_model_exclude_unset=True)
+async def get_achievements(request: Request, fields: Optional[str] = None, params: ListParams = Depends(list_params)):
+    selected = parse_fields(fields, Achievement)
     try:
-        achievements = await db.achievements.find().sort("order", 1).to_list(100)
-        for achievement in achievements:
-            achievement.pop('_id', None)
-        return {"success": True, "data": achievements}
+        return await serve_list(
+            request, "achievements", {}, selected, params, ("achievements", selected),
+            lambda: fetch_achievements(selected)
+        )
     except Exception as e:
         logging.error(f"Error fetching achievements: {e}")
         return {"success": False, "message": "Failed to fetch achievements"}
 
 # Creative works endpoints
-@api_router.get("/creative-works")
-async def get_creative_works():
+@api_router.get("/creative-works", response_model=ApiResponse[List[CreativeWorkOut]],
+                response_model_exclude_unset=True)
+async def get_creative_works(request: Request, fields: Optional[str] = None, summary: bool = False):
+    selected = parse_fields(fields, CreativeWork)
+    if summary and selected == ("fullContent",):
+        raise HTTPException(status_code=400, detail="fullContent is left out of summaries")
     try:
-        creative_works = await db.creative_works.find().to_list(100)
-        for work in creative_works:
-            work.pop('_id', None)
-        return {"success": True, "data": creative_works}
+        return await serve_snapshot(
+            request, ("creative_works", selected, summary), ("creative_works",),
+            lambda: fetch_creative_works(selected, summary), selected is None
+        )
     except Exception as e:
         logging.error(f"Error fetching creative works: {e}")
         return {"success": False, "message": "Failed to fetch creative works"}
 
+@api_router.get("/creative-works/{work_id}", response_model=ApiResponse[CreativeWorkOut],
+                response_model_exclude_unset=True)
+async def get_creative_work(request: Request, work_id: str):
+    async def load_work():
+        work = await fetch_creative_work(work_id)
+        if not work:
+            raise HTTPException(status_code=404, detail="Creative work not found")
+        return work
+
+    try:
+        return await serve_snapshot(request, ("creative_work", work_id), ("creative_works",), load_work)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error fetching creative work {work_id}: {e}")
+        return {"success": False, "message": "Failed to fetch creative work"}
+
 # Photography endpoints
-@api_router.get("/photography")
-async def get_photography():
+@api_router.get("/photography", response_model=ListResponse[PhotographyOut],
+                response_model_exclude_unset=True)
+async def get_photography(request: Request, fields: Optional[str] = None, params: ListParams = Depends(list_params)):
+    selected = parse_fields(fields, Photography)
     try:
-        photos = await db.photography.find().sort("order", 1).to_list(100)
-        for photo in photos:
-            photo.pop('_id', None)
-        return {"success": True, "data": photos}
+        return await serve_list(
+            request, "photography", {}, selected, params, ("photography", selected),
+            lambda: fetch_photography(selected)
+        )
     except Exception as e:
         logging.error(f"Error fetching photography: {e}")
         return {"success": False, "message": "Failed to fetch photography"}
 
+# Create / update / delete routes for the id-keyed collections
+# POST upserts the whole document (the id defaults to a new uuid), PUT sets the
+# fields given in the body (any subset; the job fails if the id does not
+# exist), DELETE removes the document; all are queued.
+# Batch variants submit many documents as one job, which the queue flushes in
+# a single bulk_write: POST <path>/batch upserts, POST <path>/batch/delete
+# removes, and PUT <path>/order renumbers `order` to follow the given ids,
+# which must be exactly the collection's ids.
+MAX_BATCH_ITEMS = int(os.environ.get('WRITE_BATCH_SIZE', 100))
+
+class BatchIds(BaseModel):
+    ids: List[str] = Field(..., min_length=1)
+
+def check_batch(ids: List[str]):
+    if len(ids) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_ITEMS} items per batch")
+    duplicates = sorted({item_id for item_id in ids if ids.count(item_id) > 1})
+    if duplicates:
+        raise HTTPException(status_code=400, detail=f"Duplicate ids: {', '.join(duplicates)}")
+
+def check_ids(ids: List[Optional[str]]):
+    if any(item_id is None for item_id in ids):
+        raise HTTPException(status_code=400, detail="id must not be null")
+
+def nullable(model, name: str) -> bool:
+    """Whether the model's own annotation for the field allows None"""
+    return type(None) in get_args(model.model_fields[name].annotation)
+
+def update_model(model):
+    """The model's fields, all optional, for partial PUT bodies"""
+    fields = {
+        name: (Optional[field.annotation], None)
+        for name, field in model.model_fields.items() if name != "id"
+    }
+    return create_model(f"{model.__name__}Update", **fields)
+
+def add_write_routes(path: str, collection: str, model):
+    partial_model = update_model(model)
+
+    def stored(item) -> dict:
+        document = item.dict()
+        document['createdAt'] = document['updatedAt'] = datetime.utcnow()
+        return document
+
+    async def create_item(item: model):
+        check_ids([item.id])
+        return queue_writes(Write(collection, {"id": item.id}, REPLACE, stored(item)), id=item.id)
+
+    async def create_items(items: List[model]):
+        ids = [item.id for item in items]
+        if not ids:
+            raise HTTPException(status_code=400, detail="No items given")
+        check_ids(ids)
+        check_batch(ids)
+        return queue_writes(*(Write(collection, {"id": item.id}, REPLACE, stored(item)) for item in items), ids=ids)
+
+    async def update_item(item_id: str, item: partial_model):
+        changes = item.dict(exclude_unset=True)
+        if not changes:
+            raise HTTPException(status_code=400, detail="No fields given")
+        nulls = [name for name, value in changes.items() if value is None and not nullable(model, name)]
+        if nulls:
+            raise HTTPException(status_code=400, detail=f"Fields cannot be null: {', '.join(nulls)}")
+        changes['updatedAt'] = datetime.utcnow()
+        return queue_writes(Write(collection, {"id": item_id}, UPDATE, changes), id=item_id)
+
+    async def reorder_items(batch: BatchIds):
+        check_batch(batch.ids)
+        # The new order covers the whole collection, so two items never share a position
+        stored = {document["id"] for document in await storage.find(collection, fields=("id",), sort=False)}
+        missing = sorted(stored - set(batch.ids))
+        unknown = sorted(set(batch.ids) - stored)
+        if missing or unknown:
+            detail = "Order must list every item exactly once"
+            if missing:
+                detail += f"; missing ids: {', '.join(missing)}"
+            if unknown:
+                detail += f"; unknown ids: {', '.join(unknown)}"
+            raise HTTPException(status_code=400, detail=detail)
+        now = datetime.utcnow()
+        return queue_writes(*(
+            Write(collection, {"id": item_id}, UPDATE, {"order": position, "updatedAt": now})
+            for position, item_id in enumerate(batch.ids, start=1)
+        ), ids=batch.ids)
+
+    async def delete_item(item_id: str):
+        return queue_writes(Write(collection, {"id": item_id}, DELETE), id=item_id)
+
+    async def delete_items(batch: BatchIds):
+        check_batch(batch.ids)
+        return queue_writes(*(Write(collection, {"id": item_id}, DELETE) for item_id in batch.ids), ids=batch.ids)
+
+    options = {
+        "status_code": 202,
+        "dependencies": [Depends(require_admin)],
+        "response_model": ApiResponse[WriteJob],
+        "response_model_exclude_unset": True,
+    }
+    api_router.add_api_route(path, create_item, methods=["POST"], name=f"create_{collection}", **options)
+    api_router.add_api_route(f"{path}/batch", create_items, methods=["POST"],
+                             name=f"create_{collection}_batch", **options)
+    api_router.add_api_route(f"{path}/batch/delete", delete_items, methods=["POST"],
+                             name=f"delete_{collection}_batch", **options)
+    # Registered before {item_id} so "order" is not taken for an id
+    if "order" in model.model_fields:
+        api_router.add_api_route(f"{path}/order", reorder_items, methods=["PUT"],
+                                 name=f"reorder_{collection}", **options)
+    api_router.add_api_route(f"{path}/{{item_id}}", update_item, methods=["PUT"],
+                             name=f"update_{collection}", **options)
+    api_router.add_api_route(f"{path}/{{item_id}}", delete_item, methods=["DELETE"],
+                             name=f"delete_{collection}", **options)
+
+add_write_routes("/education", "education", Education)
+add_write_routes("/projects", "projects", Project)
+add_write_routes("/achievements", "achievements", Achievement)
+add_write_routes("/creative-works", "creative_works", CreativeWork)
+add_write_routes("/photography", "photography", Photography)
+
+# Write job status; wait (seconds) blocks until the job finishes or the wait expires
+@api_router.get("/writes/{job_id}", response_model=ApiResponse[WriteJob],
+                response_model_exclude_unset=True)
+async def get_write_job(job_id: str, wait: float = Query(0, ge=0, le=10)):
+    job = write_queue.job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Write job not found")
+    if wait and not job.done.is_set():
+        try:
+            await asyncio.wait_for(job.done.wait(), wait)
+        except asyncio.TimeoutError:
+            pass
+    return {"success": True, "data": job.to_dict()}
+
+# Search endpoint (BM25 over projects, achievements and creative works)
+@api_router.get("/search", response_model=ApiResponse[List[SearchHit]],
+                response_model_exclude_unset=True)
+async def search_portfolio(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    collections: Optional[str] = None,
+):
+    selected = None
+    if collections:
+        selected = [name.strip() for name in collections.split(",") if name.strip()]
+        unknown = [name for name in selected if name not in SEARCH_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown collections: {', '.join(unknown)}"
+            )
+    return {"success": True, "data": search_index.search(q, limit, selected)}
+
+# Analytics endpoints
+# Accepts one event or a list of them, as JSON from fetch() or as the
+# text/plain body navigator.sendBeacon() sends. Events for ids that do not
+# exist (any more) are ignored.
+@api_router.post("/track", status_code=204)
+async def track_events(request: Request):
+    try:
+        body = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON event or list of events")
+
+    events = body if isinstance(body, list) else [body]
+    if len(events) > MAX_TRACK_EVENTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_TRACK_EVENTS} events per request")
+    for event in events:
+        if (not isinstance(event, dict) or event.get("type") not in KINDS
+                or not isinstance(event.get("id"), (str, int)) or event.get("event", "view") not in EVENTS):
+            raise HTTPException(
+                status_code=400,
+                detail="Each event needs a type (project or photo), an id and optionally an event (view or click)"
+            )
+
+    fallback_visitor = f"{request.client.host if request.client else ''}|{request.headers.get('user-agent', '')}"
+    for event in events:
+        item_id = str(event["id"])
+        if analytics.known(event["type"], item_id):
+            visitor = event.get("visitor")
+            analytics.track(event["type"], item_id, event.get("event", "view"),
+                            visitor if isinstance(visitor, str) and visitor else fallback_visitor)
+    return Response(status_code=204)
+
+@api_router.get("/stats", response_model=ApiResponse[List[ItemStats]],
+                response_model_exclude_unset=True)
+async def get_item_stats(
+    kind: str = Query("project", alias="type"),
+    days: int = Query(ANALYTICS_RANK_DAYS, ge=1, le=366),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+):
+    if kind not in KINDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown type: {kind} (expected {', '.join(KINDS)})"
+        )
+    try:
+        ranking = await fetch_item_stats(kind, days)
+        return {"success": True, "data": ranking[:limit] if limit else ranking}
+    except Exception as e:
+        logging.error(f"Error fetching {kind} stats: {e}")
+        return {"success": False, "message": "Failed to fetch stats"}
+
+# Live update stream (text/event-stream)
+# Events: "change" {collection, id, op, changed, fields?, partial}, "reload"
+# {collections} and "reset" (refetch everything). Heartbeat comments keep
+# idle connections open through proxies.
+@api_router.get("/events")
+async def stream_events(last_event_id: Optional[str] = Header(None)):
+    if event_broker.full():
+        raise HTTPException(
+            status_code=503,
+            detail="Too many event stream clients",
+            headers={"Retry-After": "5"},
+        )
+    return StreamingResponse(
+        event_broker.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Image proxy endpoint (resized, re-encoded and cached on disk)
+@api_router.get("/images/{image_key}")
+async def get_image(request: Request, image_key: str, w: Optional[int] = Query(None, ge=1, le=4096)):
+    if image_key not in image_proxy.sources:
+        # Sources are registered whenever projects and photos are read
+        await asyncio.gather(fetch_projects(), fetch_photography())
+    if image_key not in image_proxy.sources:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    try:
+        path, media_type = await image_proxy.variant(image_key, w, request.headers.get("accept", ""))
+    except Exception as e:
+        logging.error(f"Error serving image {image_key}: {e}")
+        raise HTTPException(status_code=502, detail="Failed to load image")
+
+    return FileResponse(
+        path,
+        media_type=media_type,
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL, "Vary": "Accept"},
+    )
+
+# Cache statistics
+@api_router.get("/cache/stats", response_model=ApiResponse[Dict[str, Any]],
+                response_model_exclude_unset=True)
+async def get_cache_stats():
+    return {"success": True, "data": {
+        **cache.stats(),
+        "invalidation": change_watcher.stats(),
+        "storage": storage.stats(),
+        "events": event_broker.stats(),
+        "startupMs": {step: round(seconds * 1000, 3) for step, seconds in startup_timings.items()},
+    }}
+
+# Write queue statistics
+@api_router.get("/writes", response_model=ApiResponse[Dict[str, Any]],
+                response_model_exclude_unset=True)
+async def get_write_queue_stats():
+    return {"success": True, "data": write_queue.stats()}
+
+# Connection pool statistics
+@api_router.get("/db/pool", response_model=ApiResponse[Dict[str, Any]],
+                response_model_exclude_unset=True)
+async def get_db_pool_stats():
+    return {"success": True, "data": pool_stats()}
+
+# Admin endpoints
+@api_router.get("/admin/requests", dependencies=[Depends(require_admin)],
+                response_model=ApiResponse[Dict[str, Any]], response_model_exclude_unset=True)
+async def get_captured_requests():
+    captures = [capture.summary() for capture in profiler.captures()]
+    return {"success": True, "data": {**profiler.stats(), "requests": captures}}
+
+@api_router.get("/admin/requests/{capture_id}", dependencies=[Depends(require_admin)],
+                response_model=ApiResponse[Dict[str, Any]], response_model_exclude_unset=True)
+async def get_captured_request(capture_id: str):
+    capture = profiler.capture(capture_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Capture not found")
+    return {"success": True, "data": capture.detail()}
+
+# Folded stacks for flamegraph.pl / speedscope
+@api_router.get("/admin/requests/{capture_id}/stacks", dependencies=[Depends(require_admin)],
+                response_class=PlainTextResponse)
+async def get_captured_stacks(capture_id: str):
+    capture = profiler.capture(capture_id)
+    if capture is None or capture.stacks is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return capture.folded()
+
 # Data seeding endpoint (for initial setup)
 @api_router.post("/seed-data")
 async def seed_data():
@@ -201,6 +1117,48 @@ async def seed_data():
 # Include the router in the main app
 app.include_router(api_router)
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+def collect_cache_lookups():
+    return [(("hit",), cache.hits), (("miss",), cache.misses)]
+
+def collect_pool_connections():
+    stats = pool_stats()
+    return [(("in_use",), stats["inUse"]), (("idle",), stats["idle"]), (("waiting",), stats["waiting"])]
+
+register(Collector("portfolio_cache_lookups_total", "Response cache lookups by result", "counter",
+                   ("result",), collect_cache_lookups))
+register(Collector("portfolio_cache_entries", "Entries held in the response cache", "gauge",
+                   (), lambda: [((), cache.stats()["entries"])]))
+register(Collector("portfolio_cache_coalesced_total", "Cache misses that joined an identical load in flight",
+                   "counter", (), lambda: [((), cache.coalesced)]))
+register(Collector("portfolio_rate_limited_total", "Requests by rate limiter decision", "counter",
+                   ("decision",), lambda: [(("allowed",), rate_limits.allowed), (("rejected",), rate_limits.rejected)]))
+register(Collector("portfolio_tracked_events_total", "Analytics events by buffer decision", "counter",
+                   ("result",), lambda: [(("accepted",), analytics.tracked), (("dropped",), analytics.dropped)]))
+register(Collector("portfolio_analytics_pending_keys", "Item/day counters waiting for the next analytics flush",
+                   "gauge", (), lambda: [((), len(analytics))]))
+register(Collector("portfolio_event_stream_clients", "Open /api/events connections", "gauge",
+                   (), lambda: [((), len(event_broker))]))
+register(Collector("portfolio_write_queue_pending", "Documents waiting in the write queue", "gauge",
+                   (), lambda: [((), len(write_queue))]))
+register(Collector("mongo_pool_connections", "Motor pool connections by state", "gauge",
+                   ("state",), collect_pool_connections))
+
+# Innermost, so rejections still carry CORS headers the browser can read
+if rate_limits.rate > 0:
+    app.add_middleware(
+        RateLimitMiddleware,
+        buckets=rate_limits,
+        trusted_proxies=(
+            int(os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', 1))
+            if os.environ.get('RATE_LIMIT_TRUST_FORWARDED', '').lower() in ('1', 'true', 'yes') else 0
+        ),
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -209,13 +1167,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compresses responses that were not precompressed (errors, pages streamed
+# as NDJSON, metrics); snapshots and images pass through untouched
+app.add_middleware(CompressionMiddleware)
+
+# Inside MetricsMiddleware, which sets up the per-request phases it reads
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+# Outermost, so request timings include CORS and every other middleware
+app.add_middleware(MetricsMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
@@ -0,0 +1,100 @@
+"""
+Pre-serialized response snapshots for the read-only portfolio routes.
+A snapshot holds the encoded JSON body, its gzip/brotli variants and a strong
+ETag computed from its content, so cached responses are written straight to
+the socket without re-encoding or re-compressing, and conditional requests
+can be answered with 304 Not Modified.
+
+JSON is encoded with orjson when it is installed (natively handling datetime
+and the other types Mongo documents carry) and with the stdlib otherwise.
+"""
+
+import asyncio
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from compression import MIN_SIZE, choose_encoding, precompress
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder is the fallback
+    orjson = None
+
+# Default response class for the API: orjson-rendered when available
+FastJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+
+def encode_json(payload: Any) -> bytes:
+    """Encode a payload to compact UTF-8 JSON, as the API's response class does"""
+    if orjson is not None:
+        # default only runs for types orjson does not know (e.g. Pydantic models)
+        return orjson.dumps(payload, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class Snapshot:
+    __slots__ = ("body", "etag", "encoded")
+
+    media_type = "application/json"
+    cache_control = "no-cache"
+
+    def __init__(self, payload: Any, encoded: Optional[Dict[str, bytes]] = None):
+        self.body = encode_json(payload)
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+        self.encoded = precompress(self.body) if encoded is None else encoded
+
+    async def precompress(self, fast: bool = False) -> None:
+        """Compress the body in a worker thread so the event loop keeps serving"""
+        if len(self.body) >= MIN_SIZE:
+            self.encoded = await asyncio.to_thread(precompress, self.body, fast)
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Check an If-None-Match header against this snapshot's ETag"""
+        if not if_none_match:
+            return False
+        for candidate in if_none_match.split(","):
+            candidate = candidate.strip()
+            if candidate == "*":
+                return True
+            # If-None-Match uses weak comparison, so W/ prefixes still match,
+            # and any encoding of the same content is still fresh
+            if candidate.startswith("W/"):
+                candidate = candidate[2:]
+            if candidate.split("-", 1)[0].rstrip('"') == self.etag.rstrip('"'):
+                return True
+        return False
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        # Each representation needs its own strong ETag
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+    def headers(self, encoding: Optional[str] = None) -> dict:
+        headers = {
+            "ETag": self.etag_for(encoding),
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return headers
+
+    def to_response(self, request: Request) -> Response:
+        encoding = choose_encoding(request.headers.get("accept-encoding"), tuple(self.encoded))
+        if self.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=self.headers(encoding))
+        return Response(
+            content=self.encoded[encoding] if encoding else self.body,
+            media_type=self.media_type,
+            headers=self.headers(encoding),
+        )
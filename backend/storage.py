@@ -0,0 +1,360 @@
+"""
+Storage backends behind the read handlers.
+MongoStorage queries MongoDB on every call. MemoryStorage loads each portfolio
+collection into slotted records, pre-sorted on the (order, id) keyset with an
+id index and per-value indexes (project type), so reads never leave the
+process. It reloads a collection from MongoDB when the write hook reports a
+change, and can persist its tables to a snapshot file that is memory-mapped
+and parsed on the next start, so a restart only refetches the collections
+whose cache_versions counter moved since the file was written.
+
+Both backends take the same arguments and return the same documents:
+`match` is an equality filter, `fields` / `exclude` a projection (excluded
+fields are dropped even when listed in `fields`), and `after` an (order, id)
+keyset position as decoded by pagination.decode_cursor(). MongoStorage
+records its queries in the mongo metrics; MemoryStorage reads count towards
+the request's "storage" phase instead.
+"""
+
+import asyncio
+import bisect
+import json
+import logging
+import mmap
+import os
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from invalidation import read_versions
+from metrics import mongo_timer, phase
+from pagination import KEYSET_SORT, keyset_query
+from snapshots import encode_json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+COLLECTIONS = ("profile", "education", "skills", "projects", "achievements", "creative_works", "photography")
+
+# Fields with a value -> rows index in MemoryStorage, besides the id index
+VALUE_INDEXES = {"projects": ("type",)}
+
+SNAPSHOT_FORMAT = 1
+
+
+def build_projection(fields: Optional[Tuple[str, ...]] = None, exclude: Tuple[str, ...] = ()) -> dict:
+    """Mongo projection for the requested fields, always dropping _id"""
+    if fields:
+        projection = {name: 1 for name in fields if name not in exclude}
+    else:
+        projection = {name: 0 for name in exclude}
+    projection['_id'] = 0
+    return projection
+
+
+class MongoStorage:
+    """Every read is a MongoDB query"""
+
+    name = "mongo"
+
+    def __init__(self, database):
+        self.database = database
+
+    async def start(self) -> None:
+        pass
+
+    async def refresh(self, *collections: str) -> None:
+        pass
+
+    async def find_one(self, collection: str, match: dict, fields: Optional[Tuple[str, ...]] = None,
+                       exclude: Tuple[str, ...] = ()) -> Optional[dict]:
+        with mongo_timer(collection, "find_one"):
+            return await self.database[collection].find_one(match, build_projection(fields, exclude))
+
+    async def find(self, collection: str, match: Optional[dict] = None, fields: Optional[Tuple[str, ...]] = None,
+                   exclude: Tuple[str, ...] = (), sort: bool = True) -> List[dict]:
+        cursor = self.database[collection].find(match or {}, build_projection(fields, exclude))
+        if sort:
+            cursor = cursor.sort(KEYSET_SORT)
+        with mongo_timer(collection, "find"):
+            return await cursor.to_list(None)
+
+    async def find_page(self, collection: str, match: dict, fields: Optional[Tuple[str, ...]],
+                        after: Optional[Tuple[Any, Any]], limit: int) -> List[dict]:
+        cursor = self.database[collection].find(
+            keyset_query(match, after), build_projection(fields)
+        ).sort(KEYSET_SORT).limit(limit)
+        with mongo_timer(collection, "find_page"):
+            return await cursor.to_list(None)
+
+    async def iterate(self, collection: str, match: dict, fields: Optional[Tuple[str, ...]],
+                      after: Optional[Tuple[Any, Any]], limit: Optional[int] = None,
+                      batch_size: int = 100) -> AsyncIterator[dict]:
+        cursor = self.database[collection].find(
+            keyset_query(match, after), build_projection(fields)
+        ).sort(KEYSET_SORT).batch_size(batch_size)
+        if limit:
+            cursor = cursor.limit(limit)
+        try:
+            async for document in cursor:
+                yield document
+        finally:
+            await cursor.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class _Missing:
+    """Marks a field a document does not have, as opposed to a stored null"""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+MISSING = _Missing()
+
+
+def keyset_key(order: Any, doc_id: Any) -> tuple:
+    # Mongo sorts missing/null before numbers
+    return (order is not None, 0 if order is None else order, "" if doc_id is None else doc_id)
+
+
+def _freeze(value: Any) -> Any:
+    """Records are shared by every reader, so arrays are stored (and returned) as tuples"""
+    return tuple(value) if isinstance(value, list) else value
+
+
+class Table:
+    """One collection held as slotted records in natural and keyset order"""
+
+    __slots__ = ("name", "fields", "record", "rows", "ordered", "keys", "by_id", "by_value")
+
+    def __init__(self, name: str, documents: List[dict]):
+        self.name = name
+        self.fields = tuple(dict.fromkeys(key for document in documents for key in document if key != "_id"))
+        # Each row also keeps its own field order (shared between rows with the
+        # same layout), so documents come back exactly as Mongo returns them
+        self.record = type(f"{name}_record", (), {"__slots__": self.fields + ("_keys",)})
+
+        layouts: Dict[tuple, tuple] = {}
+        self.rows = []
+        for document in documents:
+            row = self.record()
+            for field in self.fields:
+                setattr(row, field, _freeze(document.get(field, MISSING)))
+            keys = tuple(key for key in document if key != "_id")
+            row._keys = layouts.setdefault(keys, keys)
+            self.rows.append(row)
+
+        key = self._key
+        self.ordered = sorted(self.rows, key=key)
+        self.keys = [key(row) for row in self.ordered]
+        self.by_id = {row.id: row for row in self.rows if getattr(row, "id", MISSING) is not MISSING}
+        self.by_value: Dict[str, Dict[Any, List[int]]] = {}
+        for field in VALUE_INDEXES.get(name, ()):
+            index: Dict[Any, List[int]] = {}
+            for position, row in enumerate(self.ordered):
+                value = getattr(row, field, MISSING)
+                if value is not MISSING:
+                    index.setdefault(value, []).append(position)
+            self.by_value[field] = index
+
+    @staticmethod
+    def _key(row) -> tuple:
+        return keyset_key(getattr(row, "order", None), getattr(row, "id", None))
+
+    def columns(self, fields: Optional[Tuple[str, ...]] = None, exclude: Tuple[str, ...] = ()) -> Optional[frozenset]:
+        """Projected field names, or None for every field"""
+        if not fields and not exclude:
+            return None
+        return frozenset(name for name in fields or self.fields if name not in exclude)
+
+    @staticmethod
+    def project(row, columns: Optional[frozenset]) -> dict:
+        if columns is None:
+            return {name: getattr(row, name) for name in row._keys}
+        return {name: getattr(row, name) for name in row._keys if name in columns}
+
+    @staticmethod
+    def matches(row, match: dict) -> bool:
+        return all(getattr(row, field, MISSING) == value for field, value in match.items())
+
+    def positions(self, match: Optional[dict]) -> Optional[List[int]]:
+        """Positions in keyset order matching an equality filter, or None for all rows"""
+        if not match:
+            return None
+        indexed = next((field for field in match if field in self.by_value), None)
+        if indexed is not None:
+            candidates = self.by_value[indexed].get(match[indexed], [])
+        else:
+            candidates = range(len(self.ordered))
+        rest = {field: value for field, value in match.items() if field != indexed}
+        return [position for position in candidates if self.matches(self.ordered[position], rest)]
+
+    def select(self, match: Optional[dict], after: Optional[Tuple[Any, Any]] = None,
+               limit: Optional[int] = None) -> list:
+        """Rows in keyset order, matching the filter, strictly after the given key"""
+        positions = self.positions(match)
+        if positions is None:
+            start = bisect.bisect_right(self.keys, keyset_key(*after)) if after is not None else 0
+            return self.ordered[start:start + limit] if limit else self.ordered[start:]
+        if after is not None:
+            start = bisect.bisect_right([self.keys[position] for position in positions], keyset_key(*after))
+            positions = positions[start:]
+        if limit:
+            positions = positions[:limit]
+        return [self.ordered[position] for position in positions]
+
+    def documents(self) -> List[dict]:
+        columns = self.columns()
+        return [self.project(row, columns) for row in self.rows]
+
+
+class MemoryStorage:
+    """Serves reads from in-process tables that are reloaded when a collection changes"""
+
+    name = "memory"
+
+    def __init__(self, database, collections: Iterable[str] = COLLECTIONS, snapshot_path: Optional[Path] = None):
+        self.database = database
+        self.collections = tuple(collections)
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.tables: Dict[str, Table] = {}
+        self.versions: Dict[str, int] = {}
+        self.loaded_from_snapshot: Tuple[str, ...] = ()
+        self.reloads = 0
+
+    def load_documents(self, documents: Dict[str, List[dict]]) -> None:
+        """Replace tables from plain documents, e.g. seed data in a test without MongoDB"""
+        for collection, rows in documents.items():
+            self.tables[collection] = Table(collection, rows)
+
+    async def start(self) -> None:
+        stale = set(self.collections)
+        if self.snapshot_path is not None and self.snapshot_path.exists():
+            try:
+                self.versions = self._read_snapshot()
+                self.loaded_from_snapshot = tuple(sorted(self.tables))
+                stale -= set(self.tables)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable storage snapshot {self.snapshot_path}: {e}")
+        if self.loaded_from_snapshot:
+            # Collections written since the snapshot are refetched; the rest start from the file
+            current = await read_versions(self.database, self.collections)
+            stale |= {name for name in self.collections if current.get(name, 0) != self.versions.get(name, 0)}
+        await self.refresh(*sorted(stale))
+
+    async def refresh(self, *collections: str) -> None:
+        """Reload collections from MongoDB after they changed"""
+        collections = [name for name in collections if name in self.collections]
+        if not collections:
+            return
+        # Versions are read first, so a write racing the reload leaves the
+        # recorded version behind the data and the next start refetches it
+        versions = await read_versions(self.database, collections)
+        results = await asyncio.gather(
+            *(self.database[name].find({}, {"_id": 0}).to_list(None) for name in collections)
+        )
+        for name, documents in zip(collections, results):
+            self.tables[name] = Table(name, documents)
+            self.versions[name] = versions.get(name, 0)
+        self.reloads += 1
+        if self.snapshot_path is not None:
+            try:
+                await asyncio.to_thread(self._write_snapshot)
+            except Exception as e:
+                logger.error(f"Error writing storage snapshot {self.snapshot_path}: {e}")
+
+    def _table(self, collection: str) -> Table:
+        table = self.tables.get(collection)
+        if table is None:
+            raise RuntimeError(f"Collection {collection} is not loaded in memory storage")
+        return table
+
+    async def find_one(self, collection: str, match: dict, fields: Optional[Tuple[str, ...]] = None,
+                       exclude: Tuple[str, ...] = ()) -> Optional[dict]:
+        with phase("storage"):
+            table = self._table(collection)
+            if set(match) == {"id"}:
+                row = table.by_id.get(match["id"])
+            elif match:
+                rows = table.select(match, limit=1)
+                row = rows[0] if rows else None
+            else:
+                row = table.rows[0] if table.rows else None
+            return table.project(row, table.columns(fields, exclude)) if row is not None else None
+
+    async def find(self, collection: str, match: Optional[dict] = None, fields: Optional[Tuple[str, ...]] = None,
+                   exclude: Tuple[str, ...] = (), sort: bool = True) -> List[dict]:
+        with phase("storage"):
+            table = self._table(collection)
+            if sort:
+                rows = table.select(match)
+            else:
+                rows = [row for row in table.rows if not match or table.matches(row, match)]
+            columns = table.columns(fields, exclude)
+            return [table.project(row, columns) for row in rows]
+
+    async def find_page(self, collection: str, match: dict, fields: Optional[Tuple[str, ...]],
+                        after: Optional[Tuple[Any, Any]], limit: int) -> List[dict]:
+        with phase("storage"):
+            table = self._table(collection)
+            columns = table.columns(fields)
+            return [table.project(row, columns) for row in table.select(match, after, limit)]
+
+    async def iterate(self, collection: str, match: dict, fields: Optional[Tuple[str, ...]],
+                      after: Optional[Tuple[Any, Any]], limit: Optional[int] = None,
+                      batch_size: int = 100) -> AsyncIterator[dict]:
+        table = self._table(collection)
+        rows = table.select(match, after, limit)
+        columns = table.columns(fields)
+        for start in range(0, len(rows), batch_size):
+            for row in rows[start:start + batch_size]:
+                yield table.project(row, columns)
+            # Let other requests run between batches, like a cursor's getMore
+            await asyncio.sleep(0)
+
+    def _write_snapshot(self) -> None:
+        payload = {
+            "format": SNAPSHOT_FORMAT,
+            "versions": self.versions,
+            "collections": {name: table.documents() for name, table in self.tables.items()},
+        }
+        temporary = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+        temporary.parent.mkdir(parents=True, exist_ok=True)
+        temporary.write_bytes(encode_json(payload))
+        os.replace(temporary, self.snapshot_path)
+
+    def _read_snapshot(self) -> Dict[str, int]:
+        with open(self.snapshot_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            # orjson parses straight from the mapping; the stdlib needs a bytes copy
+            payload = orjson.loads(memoryview(mapped)) if orjson is not None else json.loads(mapped[:])
+        if payload.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"unsupported format {payload.get('format')}")
+        collections = {name: documents for name, documents in payload["collections"].items()
+                       if name in self.collections}
+        self.load_documents(collections)
+        return payload.get("versions", {})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "rows": {name: len(table.rows) for name, table in sorted(self.tables.items())},
+            "reloads": self.reloads,
+            "snapshot": str(self.snapshot_path) if self.snapshot_path else None,
+            "loadedFromSnapshot": list(self.loaded_from_snapshot),
+        }
+
+
+def create_storage(backend: str, database, snapshot_path: Optional[Path] = None):
+    if backend == "mongo":
+        return MongoStorage(database)
+    if backend == "memory":
+        return MemoryStorage(database, snapshot_path=snapshot_path)
+    raise ValueError(f"Unknown storage backend: {backend}")
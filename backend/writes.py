@@ -0,0 +1,325 @@
+"""
+Background write queue for the editing endpoints.
+Write routes enqueue their changes and return a job id straight away; a single
+worker flushes the queue to Mongo with one bulk_write per collection. Writes
+to the same document that are still waiting are coalesced into one operation,
+so an editor saving rapidly costs one round-trip per flush instead of one per
+save. The queue is bounded by the number of distinct pending documents.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Operation kinds: replace upserts a whole document, update $sets some fields
+# of an existing one, delete removes it
+REPLACE, UPDATE, DELETE = "replace", "update", "delete"
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Write:
+    __slots__ = ("collection", "filter", "kind", "document", "previous")
+
+    def __init__(self, collection: str, filter: dict, kind: str, document: Optional[dict] = None):
+        self.collection = collection
+        self.filter = filter
+        self.kind = kind
+        self.document = document
+        # The document a replace overwrote, when the queue captures them
+        self.previous: Optional[dict] = None
+
+    @property
+    def key(self) -> Hashable:
+        return (self.collection, tuple(sorted(self.filter.items())))
+
+    def merge(self, later: "Write") -> "Write":
+        """The single write equivalent to applying self and then later"""
+        if later.kind in (REPLACE, DELETE):
+            return later
+        if self.kind == DELETE:
+            # Updating a deleted document matches nothing
+            return self
+        return Write(self.collection, self.filter, self.kind, {**self.document, **later.document})
+
+    def operation(self):
+        if self.kind == REPLACE:
+            return ReplaceOne(self.filter, self.document, upsert=True)
+        if self.kind == UPDATE:
+            return UpdateOne(self.filter, {"$set": self.document})
+        return DeleteOne(self.filter)
+
+
+class Job:
+    __slots__ = ("id", "collections", "status", "error", "created_at", "completed_at", "remaining", "done")
+
+    def __init__(self, collections: Iterable[str]):
+        self.id = str(uuid.uuid4())
+        self.collections = sorted(set(collections))
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.completed_at: Optional[float] = None
+        self.remaining = 0
+        self.done = asyncio.Event()
+
+    def _write_finished(self, error: Optional[str]) -> None:
+        if error and not self.error:
+            self.error = error
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.status = "failed" if self.error else "done"
+            self.completed_at = time.time()
+            self.done.set()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "jobId": self.id,
+            "status": self.status,
+            "collections": self.collections,
+            "error": self.error,
+            "createdAt": self.created_at,
+            "completedAt": self.completed_at,
+        }
+
+
+class _Pending:
+    __slots__ = ("write", "jobs")
+
+    def __init__(self, write: Write):
+        self.write = write
+        self.jobs: List[Job] = []
+
+
+class WriteQueue:
+    def __init__(
+        self,
+        database,
+        on_commit: Callable[..., Awaitable[None]],
+        max_pending: int = 1000,
+        batch_size: int = 100,
+        flush_interval: float = 0.05,
+        max_jobs: int = 1024,
+        on_written: Optional[Callable[[List[Write]], None]] = None,
+        local_changes=None,
+        capture_previous: bool = False,
+    ):
+        self.database = database
+        self.on_commit = on_commit
+        self.on_written = on_written
+        # Told about each bulk_write so the change watcher can skip its echo
+        self.local_changes = local_changes
+        self.capture_previous = capture_previous
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_jobs = max_jobs
+        self._pending: "OrderedDict[Hashable, _Pending]" = OrderedDict()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.enqueued = 0
+        self.coalesced = 0
+        self.flushed = 0
+        self.failed = 0
+        self.batches = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush everything still queued, then stop the worker"""
+        if self._worker is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._worker
+        self._worker = None
+
+    def submit(self, *writes: Write) -> Job:
+        """Queue writes under one job; raises QueueFull when there is no room"""
+        new_keys = {write.key for write in writes if write.key not in self._pending}
+        if len(self._pending) + len(new_keys) > self.max_pending:
+            raise QueueFull(f"{len(self._pending)} writes already pending")
+
+        job = Job(write.collection for write in writes)
+        for write in writes:
+            pending = self._pending.get(write.key)
+            if pending is None:
+                pending = self._pending[write.key] = _Pending(write)
+            else:
+                pending.write = pending.write.merge(write)
+                self.coalesced += 1
+            if job not in pending.jobs:
+                pending.jobs.append(job)
+                job.remaining += 1
+            self.enqueued += 1
+
+        if job.remaining == 0:
+            job._write_finished(None)
+        self._remember(job)
+        self._wakeup.set()
+        return job
+
+    def job(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def _remember(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.max_jobs:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if not oldest.done.is_set():
+                break
+            del self._jobs[oldest_id]
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Give rapid follow-up saves a moment to coalesce into this flush
+            if not self._stopping and len(self._pending) < self.batch_size:
+                await asyncio.sleep(self.flush_interval)
+            while self._pending:
+                await self.flush_batch()
+            if self._stopping:
+                return
+
+    def _take_batch(self) -> List[_Pending]:
+        batch = []
+        while self._pending and len(batch) < self.batch_size:
+            batch.append(self._pending.popitem(last=False)[1])
+        return batch
+
+    async def flush_batch(self) -> None:
+        """Write up to batch_size pending documents, one bulk_write per collection"""
+        by_collection: Dict[str, List[_Pending]] = {}
+        for pending in self._take_batch():
+            by_collection.setdefault(pending.write.collection, []).append(pending)
+        if not by_collection:
+            return
+
+        results = await asyncio.gather(*(
+            self._write_collection(collection, entries) for collection, entries in by_collection.items()
+        ))
+        self.batches += 1
+
+        committed = [collection for collection, errors in zip(by_collection, results)
+                     if len(errors) < len(by_collection[collection])]
+        if committed:
+            try:
+                await self.on_commit(*committed)
+            except Exception as e:
+                logger.error(f"Error running write hook for {', '.join(committed)}: {e}")
+
+        # Jobs complete only after the hook ran, so a finished job's writes are
+        # already visible through the cached readers
+        written = []
+        for (collection, entries), errors in zip(by_collection.items(), results):
+            for index, entry in enumerate(entries):
+                error = errors.get(index)
+                if error:
+                    self.failed += 1
+                else:
+                    self.flushed += 1
+                    written.append(entry.write)
+                for job in entry.jobs:
+                    job._write_finished(error)
+
+        if written and self.on_written is not None:
+            try:
+                self.on_written(written)
+            except Exception as e:
+                logger.error(f"Error running written hook: {e}")
+
+    async def _write_collection(self, collection: str, entries: List[_Pending]) -> Dict[int, str]:
+        """Run one bulk_write; returns error messages keyed by entry index"""
+        if self.capture_previous:
+            await self._load_previous(collection, entries)
+        if self.local_changes is not None:
+            self.local_changes.expect_local(collection, len(entries))
+        try:
+            result = await self.database[collection].bulk_write(
+                [entry.write.operation() for entry in entries], ordered=False
+            )
+            errors, counts = {}, result.bulk_api_result
+        except BulkWriteError as e:
+            errors = {error["index"]: error.get("errmsg", "Write failed") for error in e.details.get("writeErrors", [])}
+            counts = e.details
+        except Exception as e:
+            logger.error(f"Error flushing writes to {collection}: {e}")
+            counts = None
+            errors = {index: str(e) for index in range(len(entries))}
+        if self.local_changes is not None:
+            changed = None
+            if counts is not None:
+                changed = sum(counts.get(name, 0) for name in ("nInserted", "nUpserted", "nModified", "nRemoved"))
+            self.local_changes.local_written(collection, len(entries), changed)
+        if counts is None:
+            return errors
+        errors.update(await self._unmatched_updates(collection, entries, errors, counts))
+        return errors
+
+    async def _load_previous(self, collection: str, entries: List[_Pending]) -> None:
+        """Read the documents the replaces are about to overwrite, in one query"""
+        replaces = [entry.write for entry in entries if entry.write.kind == REPLACE]
+        if not replaces:
+            return
+        try:
+            documents = await self.database[collection].find(
+                {"$or": [write.filter for write in replaces]}, {"_id": 0}
+            ).to_list(None)
+        except Exception as e:
+            logger.error(f"Error reading previous {collection} documents: {e}")
+            return
+        for write in replaces:
+            write.previous = next((
+                document for document in documents
+                if all(document.get(name) == value for name, value in write.filter.items())
+            ), None)
+
+    async def _unmatched_updates(
+        self, collection: str, entries: List[_Pending], errors: Dict[int, str], counts: Dict[str, Any]
+    ) -> Dict[int, str]:
+        """Updates whose document does not exist, which bulk_write does not report as errors"""
+        updates = [index for index, entry in enumerate(entries) if entry.write.kind == UPDATE and index not in errors]
+        if not updates:
+            return {}
+        # Upserting replaces count as matched when the document existed
+        replaces = sum(1 for index, entry in enumerate(entries) if entry.write.kind == REPLACE and index not in errors)
+        matched_updates = counts.get("nMatched", 0) - (replaces - counts.get("nUpserted", 0))
+        if matched_updates >= len(updates):
+            return {}
+        # Only totals are reported, so look up which of the updated documents are missing
+        missing = {}
+        for index in updates:
+            if await self.database[collection].find_one(entries[index].write.filter, {"_id": 1}) is None:
+                missing[index] = "Document not found"
+        return missing
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "maxPending": self.max_pending,
+            "enqueued": self.enqueued,
+            "coalesced": self.coalesced,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "batches": self.batches,
+            "jobs": len(self._jobs),
+        }
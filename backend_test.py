@@ -2,19 +2,49 @@
 """
 Backend API Testing Script for Portfolio Application
 Tests all portfolio API endpoints to ensure they are working correctly.
+
+Benchmark mode drives the API under concurrent load and reports throughput
+and latency percentiles per endpoint:
+
+    python backend_test.py --benchmark --concurrency 32 --duration 15 --output bench.json
+    python backend_test.py --benchmark --baseline bench.json   # compare against a saved run
+
+By default the FastAPI app runs in-process against mongomock-motor seeded with
+the portfolio data, so no server or MongoDB is needed; pass --url to load a
+running server instead. The API tests take --url too, and exercise the write
+routes when ADMIN_TOKEN is set:
+
+    ADMIN_TOKEN=... python backend_test.py --url http://localhost:8001
+
+Startup report mode prints what a cold worker pays before it can answer:
+per-module import time of `import server` in a fresh interpreter, the
+lifespan startup steps, and time to the first /api/portfolio response:
+
+    python backend_test.py --startup-report --top 20
 """
 
+import argparse
+import asyncio
+import os
+import platform
+import re
 import requests
 import json
+import math
+import subprocess
 import sys
-from typing import Dict, Any, List
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
 
 # Get backend URL from frontend .env file
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
 BACKEND_URL = "https://2dc09a96-0bc2-4cdf-a219-8b1d0c844756.preview.emergentagent.com/api"
 
 class PortfolioAPITester:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, admin_token: Optional[str] = None):
         self.base_url = base_url
+        self.admin_token = admin_token
         self.session = requests.Session()
         self.test_results = []
         
@@ -90,6 +120,23 @@ class PortfolioAPITester:
             self.log_test(endpoint, False, f"Unexpected error: {str(e)}")
             return None
     
+    def request(self, method: str, endpoint: str, **kwargs) -> Optional[requests.Response]:
+        """Send one request; logs and returns None when it cannot be made"""
+        try:
+            return self.session.request(method, f"{self.base_url}{endpoint}", timeout=10, **kwargs)
+        except requests.exceptions.RequestException as e:
+            self.log_test(endpoint, False, f"Request failed: {str(e)}")
+            return None
+
+    def expect_status(self, endpoint: str, response: Optional[requests.Response], status: int, message: str) -> bool:
+        if response is None:
+            return False
+        if response.status_code != status:
+            self.log_test(endpoint, False, f"Expected HTTP {status}, got {response.status_code}: {response.text[:200]}")
+            return False
+        self.log_test(endpoint, True, message)
+        return True
+
     def _has_id_fields(self, data: Any) -> bool:
         """Check if data contains MongoDB _id fields"""
         if isinstance(data, dict):
@@ -189,6 +236,252 @@ class PortfolioAPITester:
         expected_fields = ["id", "title", "image", "description", "order"]
         return self.test_endpoint("/photography", expected_fields)
     
+    def test_portfolio(self):
+        """Test GET /api/portfolio and its sections filter"""
+        print("\n🔍 Testing Portfolio Endpoint...")
+        sections = ["profile", "education", "skills", "projects", "achievements", "creativeWorks", "photography"]
+        data = self.test_endpoint("/portfolio", sections)
+        if data is None:
+            return None
+
+        if any("fullContent" in work for work in data["creativeWorks"]):
+            self.log_test("/portfolio", False, "Creative works should be summaries without fullContent")
+            return None
+        self.log_test("/portfolio", True, "Creative works are summaries")
+
+        subset = self.test_endpoint("/portfolio", params={"sections": "profile,skills"})
+        if subset is not None:
+            if sorted(subset) != ["profile", "skills"]:
+                self.log_test("/portfolio?sections=", False, f"Expected profile and skills, got {sorted(subset)}")
+                return None
+            self.log_test("/portfolio?sections=", True, "Returned only the requested sections")
+
+        self.expect_status("/portfolio?sections=unknown", self.request("GET", "/portfolio", params={"sections": "unknown"}),
+                           400, "Unknown section rejected")
+        return data
+
+    def test_creative_work_detail(self):
+        """Test GET /api/creative-works/{id}"""
+        print("\n🔍 Testing Creative Work Detail Endpoint...")
+        works = self.test_endpoint("/creative-works", params={"summary": "true"})
+        if not works:
+            return None
+
+        work_id = works[0]["id"]
+        work = self.test_endpoint(f"/creative-works/{work_id}", ["id", "title", "fullContent"])
+        if work is not None and work["id"] != work_id:
+            self.log_test(f"/creative-works/{work_id}", False, f"Returned work {work['id']}")
+            return None
+
+        self.expect_status("/creative-works/missing", self.request("GET", "/creative-works/does-not-exist"),
+                           404, "Unknown work answers 404")
+        return work
+
+    def test_search(self):
+        """Test GET /api/search ranking, prefix matching and collection filter"""
+        print("\n🔍 Testing Search Endpoint...")
+        projects = self.test_endpoint("/projects")
+        if not projects:
+            return None
+
+        title = projects[0]["title"]
+        word = max(re.findall(r"\w+", title), key=len)
+        hits = self.test_endpoint("/search", ["collection", "id", "title", "score"], params={"q": word})
+        if hits is None:
+            return None
+        if not any(hit["collection"] == "projects" and hit["id"] == projects[0]["id"] for hit in hits):
+            self.log_test("/search", False, f"'{word}' did not find project '{title}'")
+            return None
+        scores = [hit["score"] for hit in hits]
+        if scores != sorted(scores, reverse=True):
+            self.log_test("/search", False, "Hits are not sorted by score")
+            return None
+        self.log_test("/search", True, f"'{word}' found '{title}' among {len(hits)} ranked hits")
+
+        prefix_hits = self.test_endpoint("/search", params={"q": word[:3]})
+        if prefix_hits is not None and not prefix_hits:
+            self.log_test("/search?q=prefix", False, f"Prefix '{word[:3]}' found nothing")
+
+        filtered = self.test_endpoint("/search", params={"q": word, "collections": "achievements"})
+        if filtered and any(hit["collection"] != "achievements" for hit in filtered):
+            self.log_test("/search?collections=", False, "Hits from other collections returned")
+
+        self.expect_status("/search?collections=unknown",
+                           self.request("GET", "/search", params={"q": word, "collections": "unknown"}),
+                           400, "Unknown collection rejected")
+        return hits
+
+    def test_project_facets(self):
+        """Test GET /api/projects/facets counts and filters"""
+        print("\n🔍 Testing Project Facets Endpoint...")
+        response = self.request("GET", "/projects/facets")
+        if response is None or response.status_code != 200:
+            self.expect_status("/projects/facets", response, 200, "")
+            return None
+        body = response.json()
+        projects, facets = body.get("data") or [], body.get("facets") or {}
+        if body.get("total") != len(projects) or not {"type", "technologies", "year"} <= set(facets):
+            self.log_test("/projects/facets", False, f"Unexpected facets response: {str(body)[:200]}")
+            return None
+        self.log_test("/projects/facets", True, f"{len(projects)} projects with facets {sorted(facets)}")
+
+        project_type, count = next(iter(facets["type"].items()))
+        filtered = self.request("GET", "/projects/facets", params={"type": project_type})
+        if filtered is None or filtered.status_code != 200:
+            self.expect_status("/projects/facets?type=", filtered, 200, "")
+            return None
+        filtered_projects = filtered.json().get("data") or []
+        if len(filtered_projects) != count or any(p.get("type") != project_type for p in filtered_projects):
+            self.log_test("/projects/facets?type=", False,
+                          f"Facet promised {count} '{project_type}' projects, filter returned {len(filtered_projects)}")
+            return None
+        self.log_test("/projects/facets?type=", True, f"Facet count matches the {count} '{project_type}' projects")
+
+        self.expect_status("/projects/facets?year_from>year_to",
+                           self.request("GET", "/projects/facets", params={"year_from": 2025, "year_to": 2020}),
+                           400, "Inverted year range rejected")
+        return body
+
+    def test_pagination(self):
+        """Test keyset pagination of GET /api/projects"""
+        print("\n🔍 Testing Projects Pagination...")
+        projects = self.test_endpoint("/projects")
+        if not projects:
+            return None
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"after": cursor} if cursor else {})}
+            response = self.request("GET", "/projects", params=params)
+            if response is None or response.status_code != 200:
+                self.expect_status("/projects?limit=", response, 200, "")
+                return None
+            body = response.json()
+            seen.extend(project["id"] for project in body["data"])
+            cursor = body.get("next")
+            if not cursor or len(seen) > len(projects):
+                break
+
+        if seen != [project["id"] for project in projects]:
+            self.log_test("/projects?limit=&after=", False, f"Pages returned {seen}")
+            return None
+        self.log_test("/projects?limit=&after=", True, f"Walked {len(seen)} projects in pages of 2")
+
+        self.expect_status("/projects?after=invalid", self.request("GET", "/projects", params={"after": "!"}),
+                           400, "Invalid cursor rejected")
+        return seen
+
+    def wait_for_job(self, endpoint: str, response: Optional[requests.Response]) -> Optional[Dict[str, Any]]:
+        """Follow a 202 write job until it finishes"""
+        if response is None or response.status_code != 202:
+            self.expect_status(endpoint, response, 202, "")
+            return None
+        job_id = response.json()["data"]["jobId"]
+        status = self.request("GET", f"/writes/{job_id}", params={"wait": 5})
+        if status is None or status.status_code != 200:
+            self.expect_status(f"/writes/{job_id}", status, 200, "")
+            return None
+        return status.json()["data"]
+
+    def test_writes(self):
+        """Test the queued write routes, write jobs and the admin token check"""
+        print("\n🔍 Testing Write Endpoints...")
+        item_id = f"api-test-{int(time.time() * 1000)}"
+        project = {
+            "id": item_id, "title": "API Test Project", "date": "2024", "description": "Created by backend_test.py",
+            "technologies": ["Python"], "type": "Software", "order": 999,
+        }
+
+        response = self.request("POST", "/projects", json=project)
+        if response is not None and response.status_code in (401, 404):
+            self.log_test("/projects (POST)", True, f"Rejected without an admin token (HTTP {response.status_code})")
+        else:
+            self.expect_status("/projects (POST)", response, 401, "")
+        if not self.admin_token:
+            print("  ⏭️  Set ADMIN_TOKEN to exercise the write routes")
+            return None
+        headers = {"X-Admin-Token": self.admin_token}
+
+        job = self.wait_for_job("/projects (POST)", self.request("POST", "/projects", json=project, headers=headers))
+        if job is None or job["status"] != "done":
+            self.log_test("/projects (POST)", False, f"Create job did not finish: {job}")
+            return None
+        self.log_test("/projects (POST)", True, "Create job finished")
+
+        try:
+            job = self.wait_for_job(f"/projects/{item_id} (PUT)", self.request(
+                "PUT", f"/projects/{item_id}", json={"title": "API Test Project (edited)"}, headers=headers))
+            stored = self.test_endpoint("/projects", params={"fields": "id,title,description"}) or []
+            stored = next((p for p in stored if p["id"] == item_id), None)
+            if job is None or job["status"] != "done" or stored is None \
+                    or stored["title"] != "API Test Project (edited)" or stored["description"] != project["description"]:
+                self.log_test(f"/projects/{item_id} (PUT)", False, f"Partial update not applied: {job}, {stored}")
+            else:
+                self.log_test(f"/projects/{item_id} (PUT)", True, "Partial update kept the other fields")
+
+            job = self.wait_for_job("/projects/missing (PUT)", self.request(
+                "PUT", "/projects/does-not-exist", json={"title": "Nope"}, headers=headers))
+            if job is None or job["status"] != "failed":
+                self.log_test("/projects/missing (PUT)", False, f"Update of a missing id should fail: {job}")
+            else:
+                self.log_test("/projects/missing (PUT)", True, f"Update of a missing id failed: {job['error']}")
+
+            self.expect_status(f"/projects/{item_id} (PUT null order)", self.request(
+                "PUT", f"/projects/{item_id}", json={"order": None}, headers=headers), 400, "Null order rejected")
+            self.expect_status(f"/projects/{item_id} (PUT null image)", self.request(
+                "PUT", f"/projects/{item_id}", json={"image": None}, headers=headers), 202, "Null image accepted")
+            self.expect_status("/projects (POST null id)", self.request(
+                "POST", "/projects", json={**project, "id": None}, headers=headers), 400, "Null id rejected")
+            self.expect_status("/projects/order (subset)", self.request(
+                "PUT", "/projects/order", json={"ids": [item_id]}, headers=headers),
+                400, "Reorder of a subset rejected")
+            self.expect_status("/writes/unknown", self.request("GET", "/writes/unknown"), 404, "Unknown job answers 404")
+        finally:
+            job = self.wait_for_job(f"/projects/{item_id} (DELETE)",
+                                    self.request("DELETE", f"/projects/{item_id}", headers=headers))
+
+        remaining = self.test_endpoint("/projects") or []
+        if job is None or job["status"] != "done" or any(p["id"] == item_id for p in remaining):
+            self.log_test(f"/projects/{item_id} (DELETE)", False, f"Test project not deleted: {job}")
+            return None
+        self.log_test(f"/projects/{item_id} (DELETE)", True, "Delete job finished")
+
+        stats = self.test_endpoint("/writes", ["pending", "enqueued", "flushed", "failed"])
+        return stats
+
+    def test_analytics(self):
+        """Test POST /api/track and GET /api/stats"""
+        print("\n🔍 Testing Analytics Endpoints...")
+        projects = self.test_endpoint("/projects")
+        if not projects:
+            return None
+
+        events = [
+            {"type": "project", "id": projects[0]["id"], "visitor": "backend-test"},
+            {"type": "project", "id": projects[0]["id"], "event": "click", "visitor": "backend-test"},
+            {"type": "project", "id": "does-not-exist"},
+        ]
+        self.expect_status("/track", self.request("POST", "/track", json=events), 204, "Events accepted")
+        self.expect_status("/track (sendBeacon)", self.request(
+            "POST", "/track", data=json.dumps(events[0]), headers={"Content-Type": "text/plain"}),
+            204, "text/plain body accepted")
+        self.expect_status("/track (invalid)", self.request("POST", "/track", json={"type": "song", "id": "1"}),
+                           400, "Unknown type rejected")
+
+        # Counts are flushed in the background, so only the shape is checked here
+        stats = self.test_endpoint("/stats", params={"type": "project", "days": 30, "limit": 5})
+        if stats is not None:
+            malformed = [entry for entry in stats
+                         if not all(isinstance(entry.get(name), int) for name in ("views", "clicks", "visitors"))]
+            if malformed or len(stats) > 5:
+                self.log_test("/stats", False, f"Unexpected stats entries: {stats}")
+                return None
+            self.log_test("/stats", True, f"{len(stats)} ranked entries")
+
+        self.expect_status("/stats?type=unknown", self.request("GET", "/stats", params={"type": "song"}),
+                           400, "Unknown type rejected")
+        return stats
+
     def run_all_tests(self):
         """Run all API endpoint tests"""
         print(f"🚀 Starting Portfolio API Tests")
@@ -204,6 +497,13 @@ class PortfolioAPITester:
         self.test_achievements()
         self.test_creative_works()
         self.test_photography()
+        self.test_portfolio()
+        self.test_creative_work_detail()
+        self.test_search()
+        self.test_project_facets()
+        self.test_pagination()
+        self.test_writes()
+        self.test_analytics()
         
         # Print summary
         print("\n" + "=" * 60)
@@ -225,9 +525,306 @@ class PortfolioAPITester:
         print("\n" + "=" * 60)
         return passed == total
 
+# Request mixes for benchmark mode; each worker iteration issues one round
+# of the mix concurrently, the way the frontend fires its requests
+BENCHMARK_MIXES = {
+    "page-load": [
+        "/profile", "/education", "/skills", "/projects",
+        "/achievements", "/creative-works", "/photography",
+    ],
+    "aggregate": ["/portfolio"],
+    "filters": [
+        "/projects?project_type=All", "/projects?project_type=Robotics",
+        "/projects?project_type=Software", "/projects?project_type=Game",
+    ],
+}
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+class PortfolioBenchmark:
+    def __init__(self, mix: str, concurrency: int, duration: float, warmup: float,
+                 base_url: Optional[str] = None, use_cache: bool = True):
+        self.mix = mix
+        self.endpoints = BENCHMARK_MIXES[mix]
+        self.concurrency = concurrency
+        self.duration = duration
+        self.warmup = warmup
+        self.base_url = base_url
+        self.use_cache = use_cache
+        self.latencies: Dict[str, List[float]] = {endpoint: [] for endpoint in self.endpoints}
+        self.errors: Dict[str, int] = {endpoint: 0 for endpoint in self.endpoints}
+
+    async def _request(self, client, endpoint: str, record: bool):
+        started = time.perf_counter()
+        try:
+            response = await client.get(f"/api{endpoint}")
+            ok = response.status_code == 200 and response.json().get("success", False)
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - started
+        if record:
+            if ok:
+                self.latencies[endpoint].append(elapsed)
+            else:
+                self.errors[endpoint] += 1
+
+    async def _worker(self, client, warmup_until: float, stop_at: float):
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                return
+            record = now >= warmup_until
+            await asyncio.gather(*(self._request(client, endpoint, record) for endpoint in self.endpoints))
+
+    async def _drive(self, client) -> float:
+        started = time.perf_counter()
+        warmup_until = started + self.warmup
+        stop_at = warmup_until + self.duration
+        await asyncio.gather(*(self._worker(client, warmup_until, stop_at) for _ in range(self.concurrency)))
+        return time.perf_counter() - warmup_until
+
+    async def _run_in_process(self) -> float:
+        """Run the app in-process against a seeded mongomock-motor database"""
+        import copy
+        import httpx
+        from mongomock_motor import AsyncMongoMockClient
+
+        sys.path.insert(0, BACKEND_DIR)
+        os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+        os.environ.setdefault("DB_NAME", "benchmark")
+        # Every in-process request comes from one address; don't throttle the load generator
+        os.environ["RATE_LIMIT_PER_SECOND"] = "0"
+        if not self.use_cache:
+            os.environ["CACHE_MAX_ENTRIES"] = "0"
+
+        import database
+        database.AsyncIOMotorClient = AsyncMongoMockClient
+        import server
+        from seed_database import portfolio_data
+
+        async with server.app.router.lifespan_context(server.app):
+            data = copy.deepcopy(portfolio_data)
+            await database.db.profile.insert_one(data.pop("profile"))
+            for collection, documents in data.items():
+                await database.db[collection].insert_many(documents)
+            # Seeded behind the app's back; reload storage and derived indexes
+            await server.collections_changed("profile", *data)
+
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+                return await self._drive(client)
+
+    async def _run_remote(self) -> float:
+        import httpx
+        limits = httpx.Limits(max_connections=self.concurrency * len(self.endpoints))
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=30) as client:
+            return await self._drive(client)
+
+    def run(self) -> Dict[str, Any]:
+        """Run the benchmark and return the results document"""
+        target = self.base_url or "in-process (mongomock-motor)"
+        print(f"🏁 Benchmarking '{self.mix}' mix against {target}")
+        print(f"   concurrency={self.concurrency} duration={self.duration}s warmup={self.warmup}s cache={'on' if self.use_cache else 'off'}")
+
+        runner = self._run_remote() if self.base_url else self._run_in_process()
+        elapsed = asyncio.run(runner)
+
+        endpoints = {}
+        total = 0
+        for endpoint in self.endpoints:
+            values = sorted(self.latencies[endpoint])
+            total += len(values)
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "errors": self.errors[endpoint],
+                "throughput": round(len(values) / elapsed, 2),
+                "meanMs": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+                "p50Ms": round(percentile(values, 50) * 1000, 3),
+                "p95Ms": round(percentile(values, 95) * 1000, 3),
+                "p99Ms": round(percentile(values, 99) * 1000, 3),
+            }
+
+        return {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "target": target,
+            "mix": self.mix,
+            "concurrency": self.concurrency,
+            "durationSeconds": round(elapsed, 3),
+            "cache": self.use_cache,
+            "totalRequests": total,
+            "throughput": round(total / elapsed, 2),
+            "endpoints": endpoints,
+        }
+
+def print_benchmark(results: Dict[str, Any]):
+    print("\n" + "=" * 60)
+    print("📊 BENCHMARK RESULTS")
+    print("=" * 60)
+    print(f"{'endpoint':<34}{'req/s':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'err':>6}")
+    for endpoint, stats in results["endpoints"].items():
+        print(f"{endpoint:<34}{stats['throughput']:>10.1f}{stats['p50Ms']:>9.2f}"
+              f"{stats['p95Ms']:>9.2f}{stats['p99Ms']:>9.2f}{stats['errors']:>6}")
+    print(f"\n⚡ Total: {results['totalRequests']} requests, {results['throughput']:.1f} req/s (latencies in ms)")
+
+def compare_benchmarks(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> bool:
+    """Compare p95 latency and throughput with a saved run; returns False on regression"""
+    print("\n" + "=" * 60)
+    print(f"🔁 COMPARISON WITH BASELINE ({baseline.get('timestamp', 'unknown')})")
+    print("=" * 60)
+    regressed = False
+    for endpoint, stats in results["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(endpoint)
+        if not before or not before["p95Ms"]:
+            print(f"  • {endpoint}: no baseline")
+            continue
+        p95_change = (stats["p95Ms"] - before["p95Ms"]) / before["p95Ms"] * 100
+        throughput_change = ((stats["throughput"] - before["throughput"]) / before["throughput"] * 100
+                             if before["throughput"] else 0.0)
+        failed = p95_change > threshold
+        regressed = regressed or failed
+        status = "❌" if failed else "✅"
+        print(f"  {status} {endpoint}: p95 {before['p95Ms']:.2f} → {stats['p95Ms']:.2f} ms ({p95_change:+.1f}%), "
+              f"throughput {throughput_change:+.1f}%")
+    return not regressed
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+def measure_imports() -> Dict[str, float]:
+    """Self import time of `import server` per top-level package, in ms, from a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import server failed:\n{result.stderr.strip().splitlines()[-1]}")
+    packages: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            package = match.group(4).split(".")[0]
+            packages[package] = packages.get(package, 0.0) + int(match.group(1)) / 1000
+    return packages
+
+async def measure_first_request() -> Dict[str, Any]:
+    """Import the app, run its startup and serve one request in-process against mongomock-motor"""
+    sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "startup")
+    os.environ["CACHE_INVALIDATION"] = "off"
+
+    started = time.perf_counter()
+    import server
+    imported = time.perf_counter()
+
+    # Test tooling, loaded after the measured import
+    import copy
+    import httpx
+    from mongomock_motor import AsyncMongoMockClient
+    import database
+    from seed_database import portfolio_data
+    database.AsyncIOMotorClient = AsyncMongoMockClient
+    data = copy.deepcopy(portfolio_data)
+    await database.connect_database().profile.insert_one(data.pop("profile"))
+    for collection, documents in data.items():
+        await database.db[collection].insert_many(documents)
+
+    lifespan_started = time.perf_counter()
+    async with server.app.router.lifespan_context(server.app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            response = await client.get("/api/portfolio")
+        answered = time.perf_counter()
+
+    startup = ready - lifespan_started
+    return {
+        "importMs": round((imported - started) * 1000, 3),
+        "startupMs": round(startup * 1000, 3),
+        "startupSteps": {step: round(seconds * 1000, 3) for step, seconds in server.startup_timings.items()},
+        "firstRequestMs": round((answered - ready) * 1000, 3),
+        "firstRequestStatus": response.status_code,
+        "timeToFirstRequestMs": round((imported - started + startup + answered - ready) * 1000, 3),
+    }
+
+def print_startup_report(report: Dict[str, Any], top: int):
+    print("\n" + "=" * 60)
+    print("🚀 STARTUP REPORT")
+    print("=" * 60)
+    imports = report["imports"]
+    print(f"📦 import server in a fresh interpreter: {sum(imports.values()):.1f} ms (self time per package)")
+    for package, ms in sorted(imports.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {package:<40}{ms:>10.2f}")
+
+    first = report["firstRequest"]
+    print(f"\n⏱️  Time to first request (in-process, mongomock-motor): {first['timeToFirstRequestMs']:.1f} ms")
+    print(f"  {'import server':<40}{first['importMs']:>10.2f}")
+    print(f"  {'lifespan startup':<40}{first['startupMs']:>10.2f}")
+    for step, ms in first["startupSteps"].items():
+        if step != "total":
+            print(f"    {step:<38}{ms:>10.2f}")
+    print(f"  {'GET /api/portfolio (' + str(first['firstRequestStatus']) + ')':<40}{first['firstRequestMs']:>10.2f}")
+
 def main():
     """Main test execution"""
-    tester = PortfolioAPITester(BACKEND_URL)
+    parser = argparse.ArgumentParser(description="Portfolio API tests and benchmarks")
+    parser.add_argument("--benchmark", action="store_true", help="run the load benchmark instead of the API tests")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="report import times and time to first request instead of running the API tests")
+    parser.add_argument("--top", type=int, default=15, help="packages listed in the startup report")
+    parser.add_argument("--url", help="API root to test or benchmark, e.g. http://localhost:8001 "
+                                      "(default: the preview deployment for tests, in-process app for benchmarks)")
+    parser.add_argument("--mix", choices=sorted(BENCHMARK_MIXES), default="page-load", help="request mix per iteration")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent virtual clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=1.0, help="unmeasured seconds before recording")
+    parser.add_argument("--no-cache", action="store_true", help="disable the response cache (in-process only)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare against")
+    parser.add_argument("--regression-threshold", type=float, default=10.0,
+                        help="allowed p95 increase over the baseline, in percent")
+    args = parser.parse_args()
+
+    if args.startup_report:
+        report = {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "imports": {package: round(ms, 3) for package, ms in measure_imports().items()},
+            "firstRequest": asyncio.run(measure_first_request()),
+        }
+        print_startup_report(report, args.top)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"💾 Report saved to {args.output}")
+        sys.exit(0 if report["firstRequest"]["firstRequestStatus"] == 200 else 1)
+
+    if args.benchmark:
+        benchmark = PortfolioBenchmark(args.mix, args.concurrency, args.duration, args.warmup,
+                                       base_url=args.url, use_cache=not args.no_cache)
+        results = benchmark.run()
+        print_benchmark(results)
+
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"💾 Results saved to {args.output}")
+
+        if args.baseline:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            if not compare_benchmarks(results, baseline, args.regression_threshold):
+                print("💥 Performance regression detected!")
+                sys.exit(1)
+        sys.exit(0)
+
+    api_url = f"{args.url.rstrip('/')}/api" if args.url else BACKEND_URL
+    tester = PortfolioAPITester(api_url, os.environ.get("ADMIN_TOKEN"))
     success = tester.run_all_tests()
     
     if success:
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Github, Linkedin, Mail, Phone, MapPin, ExternalLink, Code, Database, Wrench, Brain, Trophy, Calendar, ChevronDown, BookOpen, Camera, Eye, EyeOff } from 'lucide-react';
 import ApiService from '../services/apiService';
 import { Card, CardContent, CardHeader, CardTitle } from './ui/card';
@@ -6,6 +6,17 @@ import { Badge } from './ui/badge';
 import { Button } from './ui/button';
 import { Separator } from './ui/separator';
 
+// Collections named in live update events -> portfolio sections
+const SECTION_NAMES = {
+  profile: 'profile',
+  education: 'education',
+  skills: 'skills',
+  projects: 'projects',
+  achievements: 'achievements',
+  creative_works: 'creativeWorks',
+  photography: 'photography',
+};
+
 const Portfolio = () => {
   const [activeSection, setActiveSection] = useState('hero');
   const [isLoaded, setIsLoaded] = useState(false);
@@ -23,35 +34,98 @@ const Portfolio = () => {
   });
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [selectedType, setSelectedType] = useState('All');
+  const [typeCounts, setTypeCounts] = useState(null);
+  // Project filter in effect once the user picked one, for the live update handlers
+  const projectFilter = useRef(null);
 
   useEffect(() => {
     setIsLoaded(true);
     loadPortfolioData();
   }, []);
 
+  // Apply live updates: small partial changes are patched in place, anything
+  // else refetches just the affected sections in one /portfolio request
+  useEffect(() => {
+    let pending = new Set();
+    let timer = null;
+
+    const refetch = (sections) => {
+      sections.forEach((section) => pending.add(section));
+      clearTimeout(timer);
+      timer = setTimeout(async () => {
+        const names = Array.from(pending);
+        pending = new Set();
+        // A filtered project grid is refreshed through the facet query, so it
+        // keeps its filter and the type counts stay current
+        const type = projectFilter.current;
+        const filtered = type !== null && names.includes('projects');
+        const others = filtered ? names.filter((name) => name !== 'projects') : names;
+        try {
+          const [data, facetResult] = await Promise.all([
+            others.length ? ApiService.getPortfolio(others) : {},
+            filtered ? ApiService.getProjectFacets({ type }) : null,
+          ]);
+          setPortfolioData((current) => ({ ...current, ...data }));
+          // Skipped when the user picked another filter meanwhile
+          if (facetResult && projectFilter.current === type) {
+            setPortfolioData((current) => ({ ...current, projects: facetResult.projects }));
+            setTypeCounts(facetResult.facets.type);
+          }
+        } catch (err) {
+          console.error('Error refreshing portfolio sections:', err);
+        }
+      }, 250);
+    };
+
+    const patch = (change) => {
+      const section = SECTION_NAMES[change.collection];
+      if (!section) return;
+      // Skills are grouped by category on the client, so they are always
+      // refetched; so are projects whose type changed under a type filter
+      const leavesFilter = section === 'projects' && projectFilter.current !== null && change.changed.includes('type');
+      if (!change.partial || !change.fields || section === 'skills' || leavesFilter) {
+        refetch([section]);
+        return;
+      }
+      setPortfolioData((current) => {
+        const items = current[section];
+        if (!Array.isArray(items)) {
+          return { ...current, [section]: { ...items, ...change.fields } };
+        }
+        if (!items.some((item) => item.id === change.id)) {
+          refetch([section]);
+          return current;
+        }
+        return {
+          ...current,
+          [section]: items.map((item) => (item.id === change.id ? { ...item, ...change.fields } : item)),
+        };
+      });
+    };
+
+    return ApiService.subscribeToEvents({
+      onChange: patch,
+      onReload: ({ collections = [] }) => refetch(collections.map((name) => SECTION_NAMES[name]).filter(Boolean)),
+      onReset: () => refetch(Object.values(SECTION_NAMES)),
+    });
+  }, []);
+
   const loadPortfolioData = async () => {
     try {
       setLoading(true);
       
-      // Fetch all portfolio data
-      const [profile, education, skills, projects, achievements, creativeWorks, photography] = await Promise.all([
-        ApiService.getProfile(),
-        ApiService.getEducation(),
-        ApiService.getSkills(),
-        ApiService.getProjects(),
-        ApiService.getAchievements(),
-        ApiService.getCreativeWorks(),
-        ApiService.getPhotography()
-      ]);
+      // Fetch all portfolio data in a single request
+      const data = await ApiService.getPortfolio();
 
       setPortfolioData({
-        profile,
-        education,
-        skills,
-        projects,
-        achievements,
-        creativeWorks,
-        photography
+        profile: data.profile || {},
+        education: data.education,
+        skills: data.skills,
+        projects: data.projects,
+        achievements: data.achievements,
+        creativeWorks: data.creativeWorks,
+        photography: data.photography
       });
       
       setError(null);
@@ -80,18 +154,40 @@ const Portfolio = () => {
   ];
 
   const projectTypes = ['All', 'Robotics', 'Software', 'Game', 'Web', 'CAD', 'Research'];
-  const [selectedType, setSelectedType] = useState('All');
 
   const handleProjectFilter = async (type) => {
     setSelectedType(type);
+    projectFilter.current = type;
     try {
-      const filteredProjects = await ApiService.getProjects(type);
+      const { projects: filteredProjects, facets } = await ApiService.getProjectFacets({ type });
       setPortfolioData(prev => ({ ...prev, projects: filteredProjects }));
+      setTypeCounts(facets.type);
     } catch (err) {
       console.error('Error filtering projects:', err);
     }
   };
 
+  // The page loads creative work summaries; the full text is fetched on first expand
+  const handleToggleWork = async (work) => {
+    if (expandedPoem === work.id) {
+      setExpandedPoem(null);
+      return;
+    }
+    if (work.fullContent === undefined) {
+      try {
+        const fullWork = await ApiService.getCreativeWork(work.id);
+        setPortfolioData(prev => ({
+          ...prev,
+          creativeWorks: prev.creativeWorks.map(w => (w.id === work.id ? fullWork : w))
+        }));
+      } catch (err) {
+        console.error('Error loading creative work:', err);
+        return;
+      }
+    }
+    setExpandedPoem(work.id);
+  };
+
   const filteredProjects = portfolioData.projects;
 
   if (loading) {
@@ -288,6 +384,9 @@ const Portfolio = () => {
                   }
                 >
                   {type}
+                  {typeCounts && type !== 'All' && (
+                    <span className="ml-2 text-xs opacity-70">{typeCounts[type] || 0}</span>
+                  )}
                 </Button>
               ))}
             </div>
@@ -299,8 +398,12 @@ const Portfolio = () => {
                 {project.image && (
                   <div className="aspect-video overflow-hidden">
                     <img 
-                      src={project.image} 
+                      src={project.imageSrc ? ApiService.assetUrl(project.imageSrc) : project.image} 
+                      srcSet={ApiService.assetSrcset(project.imageSrcset)}
+                      sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
+                      loading="lazy"
                       alt={project.title}
+                      onLoad={() => ApiService.trackEvent('project', project.id)}
                       className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-300"
                     />
                   </div>
@@ -326,6 +429,7 @@ const Portfolio = () => {
                       href={project.link} 
                       target="_blank" 
                       rel="noopener noreferrer"
+                      onClick={() => ApiService.trackEvent('project', project.id, 'click')}
                       className="inline-flex items-center space-x-2 text-blue-400 hover:text-blue-300 transition-colors"
                     >
                       <ExternalLink className="w-4 h-4" />
@@ -397,7 +501,7 @@ const Portfolio = () => {
                       </div>
                       
                       <Button
-                        onClick={() => setExpandedPoem(expandedPoem === work.id ? null : work.id)}
+                        onClick={() => handleToggleWork(work)}
                         variant="ghost"
                         className="mt-4 text-blue-400 hover:text-blue-300 p-0"
                       >
@@ -439,8 +543,12 @@ const Portfolio = () => {
                     <Card key={index} className="bg-gray-800 border-gray-700 hover:border-blue-500/50 transition-colors overflow-hidden">
                       <div className="aspect-square overflow-hidden">
                         <img 
-                          src={photo.image} 
+                          src={photo.imageSrc ? ApiService.assetUrl(photo.imageSrc) : photo.image} 
+                          srcSet={ApiService.assetSrcset(photo.imageSrcset)}
+                          sizes="(min-width: 768px) 50vw, 100vw"
+                          loading="lazy"
                           alt={photo.title}
+                          onLoad={() => ApiService.trackEvent('photo', photo.id)}
                           className="w-full h-full object-cover hover:scale-105 transition-transform duration-300"
                         />
                       </div>
@@ -1,8 +1,65 @@
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API_BASE = `${BACKEND_URL}/api`;
+// Optional base URL of a static export (backend/export_static.py); GETs are
+// served from it when set, falling back to the API for routes it lacks
+const STATIC_API_URL = process.env.REACT_APP_STATIC_API_URL;
+
+// Same mapping as export_static.route_file: /projects?project_type=Web -> /api/projects/project_type/Web.json
+const staticPath = (endpoint) => {
+  const [path, query] = endpoint.split('?');
+  const segments = Array.from(new URLSearchParams(query || ''))
+    .map(([name, value]) => `/${encodeURIComponent(name)}/${encodeURIComponent(value)}`)
+    .join('');
+  return `/api${path}${segments}.json`;
+};
+
+// Analytics events are batched and sent with navigator.sendBeacon, which
+// survives page unloads and never delays rendering
+const TRACK_FLUSH_MS = 2000;
+const trackQueue = [];
+const trackedViews = new Set();
+let trackTimer = null;
+
+const visitorId = () => {
+  try {
+    let id = localStorage.getItem('visitorId');
+    if (!id) {
+      id = Math.random().toString(36).slice(2) + Date.now().toString(36);
+      localStorage.setItem('visitorId', id);
+    }
+    return id;
+  } catch (error) {
+    return undefined;
+  }
+};
+
+const flushTracking = () => {
+  clearTimeout(trackTimer);
+  trackTimer = null;
+  if (!trackQueue.length) return;
+  const body = JSON.stringify(trackQueue.splice(0, trackQueue.length));
+  if (!(navigator.sendBeacon && navigator.sendBeacon(`${API_BASE}/track`, body))) {
+    fetch(`${API_BASE}/track`, { method: 'POST', body, keepalive: true }).catch(() => {});
+  }
+};
+
+if (typeof window !== 'undefined') {
+  window.addEventListener('pagehide', flushTracking);
+}
 
 class ApiService {
   static async request(endpoint, options = {}) {
+    if (STATIC_API_URL && !options.method) {
+      try {
+        const response = await fetch(`${STATIC_API_URL}${staticPath(endpoint)}`);
+        if (response.ok) {
+          return await response.json();
+        }
+      } catch (error) {
+        console.warn(`Static export unavailable for ${endpoint}, using the API`);
+      }
+    }
+
     try {
       const response = await fetch(`${API_BASE}${endpoint}`, {
         headers: {
@@ -25,6 +82,26 @@ class ApiService {
     }
   }
 
+  // Resolve API-relative asset paths (e.g. proxied image URLs) against the backend
+  static assetUrl(path) {
+    return path ? `${BACKEND_URL}${path}` : path;
+  }
+
+  static assetSrcset(srcset) {
+    if (!srcset) return undefined;
+    return srcset
+      .split(', ')
+      .map((candidate) => `${BACKEND_URL}${candidate}`)
+      .join(', ');
+  }
+
+  // Aggregated portfolio API (all sections in one round-trip)
+  static async getPortfolio(sections = null) {
+    const queryParam = sections ? `?sections=${sections.join(',')}` : '';
+    const response = await this.request(`/portfolio${queryParam}`);
+    return response.data;
+  }
+
   // Profile API
   static async getProfile() {
     const response = await this.request('/profile');
@@ -58,6 +135,58 @@ class ApiService {
     return response.data;
   }
 
+  // Faceted project filters; returns matching projects and per-facet counts
+  static async getProjectFacets({ type, technologies, yearFrom, yearTo } = {}) {
+    const params = new URLSearchParams();
+    if (type && type !== 'All') params.set('type', type);
+    if (technologies && technologies.length) params.set('technologies', technologies.join(','));
+    if (yearFrom) params.set('year_from', yearFrom);
+    if (yearTo) params.set('year_to', yearTo);
+    const query = params.toString();
+    const response = await this.request(`/projects/facets${query ? `?${query}` : ''}`);
+    return { projects: response.data, facets: response.facets, total: response.total };
+  }
+
+  // Analytics API; type is 'project' or 'photo', event 'view' or 'click'
+  static trackEvent(type, id, event = 'view') {
+    if (id === undefined || id === null) return;
+    if (event === 'view') {
+      // One view per item per page load, however often its card re-renders
+      const key = `${type}:${id}`;
+      if (trackedViews.has(key)) return;
+      trackedViews.add(key);
+    }
+    trackQueue.push({ type, id, event, visitor: visitorId() });
+    if (trackQueue.length >= 100) {
+      flushTracking();
+    } else if (!trackTimer) {
+      trackTimer = setTimeout(flushTracking, TRACK_FLUSH_MS);
+    }
+  }
+
+  static async getStats(type = 'project', { days, limit } = {}) {
+    const params = new URLSearchParams({ type });
+    if (days) params.set('days', days);
+    if (limit) params.set('limit', limit);
+    const response = await this.request(`/stats?${params.toString()}`);
+    return response.data;
+  }
+
+  // Live updates (GET /api/events); returns a function that closes the stream
+  static subscribeToEvents({ onChange, onReload, onReset } = {}) {
+    if (typeof EventSource === 'undefined') return () => {};
+    const source = new EventSource(`${API_BASE}/events`);
+    const listen = (name, handler) => {
+      if (handler) {
+        source.addEventListener(name, (event) => handler(event.data ? JSON.parse(event.data) : {}));
+      }
+    };
+    listen('change', onChange);
+    listen('reload', onReload);
+    listen('reset', onReset);
+    return () => source.close();
+  }
+
   // Achievements API
   static async getAchievements() {
     const response = await this.request('/achievements');
@@ -70,6 +199,11 @@ class ApiService {
     return response.data;
   }
 
+  static async getCreativeWork(workId) {
+    const response = await this.request(`/creative-works/${workId}`);
+    return response.data;
+  }
+
   // Photography API
   static async getPhotography() {
     const response = await this.request('/photography');
@@ -0,0 +1,29 @@
+from analytics import HyperLogLog
+
+
+def test_count_is_close_to_the_number_of_distinct_values():
+    sketch = HyperLogLog()
+    for value in range(5000):
+        sketch.add(f"visitor-{value}")
+        sketch.add(f"visitor-{value}")
+    assert abs(sketch.count() - 5000) / 5000 < 0.1
+
+
+def test_small_counts_are_exact_enough():
+    sketch = HyperLogLog()
+    for value in ("a", "b", "c"):
+        sketch.add(value)
+    assert sketch.count() == 3
+    assert HyperLogLog().count() == 0
+
+
+def test_merge_and_sparse_registers_round_trip():
+    first, second = HyperLogLog(), HyperLogLog()
+    for value in range(1000):
+        (first if value % 2 else second).add(str(value))
+    first.merge(second)
+
+    restored = HyperLogLog()
+    restored.merge_registers(first.sparse())
+    assert restored.registers == first.registers
+    assert abs(restored.count() - 1000) / 1000 < 0.1
@@ -0,0 +1,104 @@
+import asyncio
+
+from cache import ResponseCache
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_concurrent_misses_share_one_load():
+    cache = ResponseCache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_load("key", loader, ("projects",)) for _ in range(5)))
+
+    assert run(scenario()) == ["value"] * 5
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_invalidate_drops_tagged_entries_only():
+    cache = ResponseCache()
+    cache.set("projects", 1, ("projects",))
+    cache.set("skills", 2, ("skills",))
+
+    assert cache.invalidate("projects") == 1
+    assert cache.get("projects") is None
+    assert cache.get("skills") == 2
+
+
+def test_read_after_invalidate_does_not_join_stale_load():
+    cache = ResponseCache()
+    data = {"value": "old"}
+
+    async def scenario():
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def slow_loader():
+            value = data["value"]
+            started.set()
+            await release.wait()
+            return value
+
+        async def loader():
+            return data["value"]
+
+        first = asyncio.ensure_future(cache.get_or_load("key", slow_loader, ("projects",)))
+        await started.wait()
+        # A write commits while the first load is still reading
+        data["value"] = "new"
+        cache.invalidate("projects")
+        # Joining the stale load would block until release, so time out instead
+        second = await asyncio.wait_for(cache.get_or_load("key", loader, ("projects",)), 1)
+        release.set()
+        return await first, second
+
+    first, second = run(scenario())
+    assert first == "old"
+    assert second == "new"
+    # The stale load is not stored over the fresh one
+    assert cache.get("key") == "new"
+
+
+def test_invalidating_other_tags_keeps_load_shared():
+    cache = ResponseCache()
+    calls = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def loader():
+            calls.append(1)
+            await release.wait()
+            return "value"
+
+        first = asyncio.ensure_future(cache.get_or_load("key", loader, ("projects",)))
+        await asyncio.sleep(0)
+        cache.invalidate("skills")
+        second = asyncio.ensure_future(cache.get_or_load("key", loader, ("projects",)))
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(first, second)
+
+    assert run(scenario()) == ["value", "value"]
+    assert len(calls) == 1
+
+
+def test_entries_expire_and_evict():
+    cache = ResponseCache(max_entries=2, ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+    cache = ResponseCache(max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    assert cache.get("a") is None
+    assert cache.get("c") == "c"
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,75 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+from events import describe_write
+from writes import DELETE, REPLACE, UPDATE, Write, WriteQueue
+
+
+def written(*documents, writes):
+    """Commit `writes` over `documents` through a capturing queue"""
+    database = AsyncMongoMockClient()["portfolio_test"]
+    seen = []
+
+    async def no_commit(*collections):
+        pass
+
+    async def run():
+        if documents:
+            await database.projects.insert_many([dict(document) for document in documents])
+        queue = WriteQueue(database, no_commit, on_written=seen.extend, capture_previous=True)
+        queue.submit(*writes)
+        await queue.flush_batch()
+
+    asyncio.run(run())
+    return seen
+
+
+def test_replace_reports_only_changed_fields():
+    before = {"id": "1", "title": "Old", "status": "Active", "order": 1}
+    after = dict(before, title="New")
+    [write] = written(before, writes=[Write("projects", {"id": "1"}, REPLACE, after)])
+    event = describe_write(write)
+    assert event["changed"] == ["title"]
+    assert event["fields"] == {"title": "New"}
+    assert event["partial"] is True
+
+
+def test_replace_dropping_a_field_is_not_partial():
+    before = {"id": "1", "title": "Old", "link": "https://example.com"}
+    after = {"id": "1", "title": "Old"}
+    [write] = written(before, writes=[Write("projects", {"id": "1"}, REPLACE, after)])
+    event = describe_write(write)
+    assert event["changed"] == ["link"]
+    assert event["partial"] is False
+
+
+def test_insert_reports_every_field():
+    document = {"id": "2", "title": "New", "createdAt": "ignored"}
+    [write] = written(writes=[Write("projects", {"id": "2"}, REPLACE, document)])
+    event = describe_write(write)
+    assert event["changed"] == ["id", "title"]
+    assert event["partial"] is False
+
+
+def test_update_and_delete():
+    update = Write("projects", {"id": "1"}, UPDATE, {"title": "New"})
+    assert describe_write(update) == {
+        "collection": "projects", "id": "1", "op": UPDATE,
+        "changed": ["title"], "fields": {"title": "New"}, "partial": True,
+    }
+    delete = Write("projects", {"id": "1"}, DELETE)
+    assert describe_write(delete) == {"collection": "projects", "id": "1", "op": DELETE}
+
+
+def test_image_changes_are_not_partial():
+    # The API serves proxied imageSrc/imageSrcset next to image, so clients refetch
+    update = Write("projects", {"id": "1"}, UPDATE, {"image": "https://example.com/new.png"})
+    assert describe_write(update)["partial"] is False
+
+    before = {"id": "1", "title": "Old", "image": "https://example.com/old.png"}
+    after = dict(before, image="https://example.com/new.png")
+    [write] = written(before, writes=[Write("projects", {"id": "1"}, REPLACE, after)])
+    event = describe_write(write)
+    assert event["changed"] == ["image"]
+    assert event["partial"] is False
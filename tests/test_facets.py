@@ -0,0 +1,62 @@
+from facets import ProjectFacets, parse_years
+
+PROJECTS = [
+    {"id": "1", "type": "Robotics", "technologies": ["Arduino", "C++"], "date": "2023"},
+    {"id": "2", "type": "Robotics", "technologies": ["Python"], "date": "Dec 2023 – Feb 2024"},
+    {"id": "3", "type": "Game", "technologies": ["C++", "Unity"], "date": "2024"},
+    {"id": "4", "type": "Software", "technologies": ["Python"], "date": "Currently Working"},
+]
+
+
+def facets():
+    project_facets = ProjectFacets()
+    project_facets.rebuild(PROJECTS, current_year=2025)
+    return project_facets
+
+
+def ids(projects):
+    return [project["id"] for project in projects]
+
+
+def test_parse_years():
+    assert parse_years("2024", 2025) == (2024,)
+    assert parse_years("Dec 2022 – Jun 2024", 2025) == (2022, 2023, 2024)
+    assert parse_years("Jun 2024 - Present", 2026) == (2024, 2025, 2026)
+    assert parse_years("Currently Working", 2025) == (2025,)
+    assert parse_years("Some day", 2025) == ()
+    assert parse_years(None, 2025) == ()
+
+
+def test_unfiltered_query_counts_every_value():
+    projects, counts = facets().query({})
+    assert ids(projects) == ["1", "2", "3", "4"]
+    assert counts["type"] == {"Game": 1, "Robotics": 2, "Software": 1}
+    assert counts["technologies"] == {"Arduino": 1, "C++": 2, "Python": 2, "Unity": 1}
+    assert counts["year"] == {"2023": 2, "2024": 2, "2025": 1}
+
+
+def test_values_are_or_ed_within_a_facet_and_and_ed_across_facets():
+    project_facets = facets()
+    projects, _ = project_facets.query({"type": ["Robotics", "Game"]})
+    assert ids(projects) == ["1", "2", "3"]
+    projects, _ = project_facets.query({"type": ["Robotics", "Game"], "technologies": ["C++"]})
+    assert ids(projects) == ["1", "3"]
+    projects, _ = project_facets.query({"type": ["Software"], "technologies": ["Unity"]})
+    assert projects == []
+
+
+def test_counts_are_disjunctive():
+    projects, counts = facets().query({"type": ["Robotics"], "technologies": ["Python"]})
+    assert ids(projects) == ["2"]
+    # Each facet is counted with the other facets' filters only
+    assert counts["type"] == {"Robotics": 1, "Software": 1}
+    assert counts["technologies"] == {"Arduino": 1, "C++": 1, "Python": 1}
+    assert counts["year"] == {"2023": 1, "2024": 1}
+
+
+def test_year_values_within_a_range():
+    project_facets = facets()
+    assert sorted(project_facets.year_values(2024, None)) == ["2024", "2025"]
+    assert sorted(project_facets.year_values(None, 2023)) == ["2023"]
+    projects, _ = project_facets.query({"year": project_facets.year_values(2025, 2025)})
+    assert ids(projects) == ["4"]
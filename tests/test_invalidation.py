@@ -0,0 +1,133 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+from invalidation import ChangeWatcher, publish_changes
+
+POLL_INTERVAL = 0.01
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def watcher(mode="poll"):
+    database = AsyncMongoMockClient()["portfolio_test"]
+    changes = []
+
+    async def on_change(*collections):
+        changes.append(collections)
+
+    change_watcher = ChangeWatcher(database, ["projects", "skills"], on_change, mode=mode,
+                                   poll_interval=POLL_INTERVAL, debounce=0)
+    return change_watcher, database, changes
+
+
+async def polls(count=5):
+    await asyncio.sleep(POLL_INTERVAL * count)
+
+
+def test_poll_skips_this_workers_own_publishes():
+    change_watcher, _, changes = watcher()
+
+    async def scenario():
+        await change_watcher.start()
+        await change_watcher.publish("projects")
+        await polls()
+        await change_watcher.publish("projects", "skills")
+        await polls()
+        await change_watcher.stop()
+
+    run(scenario())
+    assert changes == []
+    assert change_watcher.stats()["skippedOwn"] >= 2
+
+
+def test_poll_reports_a_foreign_publish_between_local_ones():
+    change_watcher, database, changes = watcher()
+
+    async def scenario():
+        await change_watcher.start()
+        await change_watcher.publish("projects")
+        await publish_changes(database, "projects")
+        await change_watcher.publish("projects")
+        await polls()
+        await change_watcher.stop()
+
+    run(scenario())
+    assert changes == [("projects",)]
+
+
+def test_poll_reports_foreign_publishes_made_before_start_only_after():
+    change_watcher, database, changes = watcher()
+
+    async def scenario():
+        await publish_changes(database, "skills")
+        await change_watcher.start()
+        await polls()
+        await publish_changes(database, "skills")
+        await polls()
+        await change_watcher.stop()
+
+    run(scenario())
+    assert changes == [("skills",)]
+
+
+def stream_event(collection, operation="update"):
+    return {"operationType": operation, "ns": {"coll": collection}}
+
+
+def changestream_watcher():
+    change_watcher, _, changes = watcher(mode="changestream")
+    # As if _watch() had opened the stream
+    change_watcher.active_mode = "changestream"
+    return change_watcher, changes
+
+
+def test_own_stream_events_are_skipped():
+    change_watcher, changes = changestream_watcher()
+
+    async def scenario():
+        change_watcher.expect_local("projects", 2)
+        for _ in range(2):
+            change_watcher._notify(change_watcher._collections_in(stream_event("projects"), skip_local=True))
+        change_watcher.local_written("projects", 2, 2)
+        change_watcher._notify(change_watcher._collections_in(stream_event("projects"), skip_local=True))
+        await asyncio.sleep(0.01)
+
+    run(scenario())
+    assert change_watcher.skipped == 2
+    # The third event was not produced by the write
+    assert changes == [("projects",)]
+
+
+def test_write_changing_fewer_documents_than_skipped_events_notifies():
+    change_watcher, changes = changestream_watcher()
+
+    async def scenario():
+        change_watcher.expect_local("projects", 2)
+        # Two events arrive before the write reports back, but it changed only
+        # one document (the other update matched nothing), so one was foreign
+        for _ in range(2):
+            change_watcher._notify(change_watcher._collections_in(stream_event("projects"), skip_local=True))
+        change_watcher.local_written("projects", 2, 1)
+        await asyncio.sleep(0.01)
+
+    run(scenario())
+    assert changes == [("projects",)]
+    assert change_watcher._echoes["projects"] == 0
+
+
+def test_write_changing_fewer_documents_expects_fewer_events():
+    change_watcher, changes = changestream_watcher()
+
+    async def scenario():
+        change_watcher.expect_local("projects", 3)
+        change_watcher.local_written("projects", 3, 1)
+        change_watcher._notify(change_watcher._collections_in(stream_event("projects"), skip_local=True))
+        change_watcher._notify(change_watcher._collections_in(stream_event("projects"), skip_local=True))
+        await asyncio.sleep(0.01)
+
+    run(scenario())
+    assert change_watcher.skipped == 1
+    assert changes == [("projects",)]
@@ -0,0 +1,23 @@
+import pytest
+from fastapi import HTTPException
+
+from pagination import decode_cursor, encode_cursor, keyset_query
+
+
+def test_cursor_round_trips_the_sort_key():
+    cursor = encode_cursor({"order": 3, "id": "project-3", "title": "ignored"})
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (3, "project-3")
+
+
+def test_invalid_cursor_is_a_bad_request():
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("not a cursor")
+    assert error.value.status_code == 400
+
+
+def test_keyset_query_continues_after_the_key():
+    continuation = {"$or": [{"order": {"$gt": 3}}, {"order": 3, "id": {"$gt": "b"}}]}
+    assert keyset_query({}, None) == {}
+    assert keyset_query({}, (3, "b")) == continuation
+    assert keyset_query({"type": "Game"}, (3, "b")) == {"$and": [{"type": "Game"}, continuation]}
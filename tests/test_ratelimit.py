@@ -0,0 +1,42 @@
+from ratelimit import RateLimitMiddleware, TokenBuckets
+
+
+def scope(*forwarded, client="10.0.0.1"):
+    headers = [(b"x-forwarded-for", value.encode("latin-1")) for value in forwarded]
+    return {"type": "http", "headers": headers, "client": (client, 1234)}
+
+
+def test_buckets_allow_burst_then_refill():
+    buckets = TokenBuckets(rate=1, burst=2)
+    assert buckets.take("a", now=0) == 0
+    assert buckets.take("a", now=0) == 0
+    assert buckets.take("a", now=0) == 1
+    assert buckets.take("b", now=0) == 0
+    assert buckets.take("a", now=1) == 0
+    assert buckets.rejected == 1
+
+
+def test_buckets_are_bounded():
+    buckets = TokenBuckets(rate=1, burst=1, max_clients=2)
+    for client in ("a", "b", "c"):
+        buckets.take(client, now=0)
+    assert len(buckets) == 2
+
+
+def test_forwarded_for_ignored_unless_trusted():
+    middleware = RateLimitMiddleware(None, TokenBuckets(1, 1))
+    assert middleware.client_ip(scope("1.2.3.4")) == "10.0.0.1"
+
+
+def test_forwarded_for_uses_address_added_by_trusted_proxy():
+    middleware = RateLimitMiddleware(None, TokenBuckets(1, 1), trusted_proxies=1)
+    # The client sent "6.6.6.6"; the proxy appended the address it saw
+    assert middleware.client_ip(scope("6.6.6.6, 1.2.3.4")) == "1.2.3.4"
+    assert middleware.client_ip(scope("6.6.6.6", "1.2.3.4")) == "1.2.3.4"
+    assert middleware.client_ip(scope()) == "10.0.0.1"
+
+
+def test_forwarded_for_counts_proxy_hops():
+    middleware = RateLimitMiddleware(None, TokenBuckets(1, 1), trusted_proxies=2)
+    assert middleware.client_ip(scope("6.6.6.6, 1.2.3.4, 172.16.0.1")) == "1.2.3.4"
+    assert middleware.client_ip(scope("1.2.3.4")) == "1.2.3.4"
@@ -0,0 +1,52 @@
+from search import SearchIndex, tokenize
+
+
+def index(*documents):
+    search_index = SearchIndex()
+    for collection, document in documents:
+        search_index.add(collection, document)
+    return search_index
+
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    assert tokenize("The Robot and the Arm") == ["robot", "arm"]
+
+
+def test_title_matches_rank_above_description_matches():
+    search_index = index(
+        ("projects", {"id": "1", "title": "Notes", "description": "a small robot"}),
+        ("projects", {"id": "2", "title": "Robot arm", "description": "six axes"}),
+    )
+    assert [hit["id"] for hit in search_index.search("robot")] == ["2", "1"]
+
+
+def test_last_token_matches_as_prefix():
+    search_index = index(("projects", {"id": "1", "title": "Robotics rover"}))
+    assert [hit["id"] for hit in search_index.search("robo")] == ["1"]
+    assert search_index.search("robo rover") != []
+    # Only the last token is a prefix
+    assert search_index.search("robo zzz") == []
+
+
+def test_search_can_be_limited_to_collections():
+    search_index = index(
+        ("projects", {"id": "1", "title": "Rover"}),
+        ("achievements", {"id": "1", "title": "Rover award"}),
+    )
+    hits = search_index.search("rover", collections=["achievements"])
+    assert [(hit["collection"], hit["id"]) for hit in hits] == [("achievements", "1")]
+
+
+def test_replace_collection_reindexes_changed_and_drops_removed_documents():
+    search_index = index(
+        ("projects", {"id": "1", "title": "Rover"}),
+        ("projects", {"id": "2", "title": "Drone"}),
+    )
+    counts = search_index.replace_collection("projects", [
+        {"id": "1", "title": "Rover"},
+        {"id": "3", "title": "Glider"},
+    ])
+    assert counts == {"indexed": 1, "removed": 1, "unchanged": 1}
+    assert search_index.search("drone") == []
+    assert [hit["id"] for hit in search_index.search("glider")] == ["3"]
+    assert search_index.stats()["documents"] == 2
@@ -0,0 +1,91 @@
+import asyncio
+import copy
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from seed_database import portfolio_data
+from snapshots import encode_json
+from storage import MemoryStorage, MongoStorage
+
+
+def seed_documents():
+    data = copy.deepcopy(portfolio_data)
+    data["profile"] = [data["profile"]]
+    return data
+
+
+def memory_storage():
+    # No MongoDB involved: tables are built straight from the seed data
+    storage = MemoryStorage(None)
+    storage.load_documents(seed_documents())
+    return storage
+
+
+def mongo_storage():
+    database = AsyncMongoMockClient()["portfolio_test"]
+
+    async def seed():
+        for name, documents in seed_documents().items():
+            await database[name].insert_many(documents)
+
+    asyncio.run(seed())
+    return MongoStorage(database)
+
+
+@pytest.fixture(scope="module")
+def backends():
+    return mongo_storage(), memory_storage()
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+# (method, args, kwargs) read through both backends
+READS = [
+    ("find_one", ("profile", {}), {}),
+    ("find_one", ("profile", {}), {"fields": ("name", "title")}),
+    ("find_one", ("creative_works", {"id": "1"}), {}),
+    ("find_one", ("projects", {"id": "missing"}), {}),
+    ("find", ("education",), {}),
+    ("find", ("projects",), {}),
+    ("find", ("projects", {"type": "Robotics"}), {}),
+    ("find", ("projects",), {"fields": ("title", "id")}),
+    ("find", ("skills",), {"fields": ("category", "items"), "sort": False}),
+    ("find", ("creative_works",), {"exclude": ("fullContent",), "sort": False}),
+    ("find", ("creative_works",), {"fields": ("title", "fullContent"), "exclude": ("fullContent",), "sort": False}),
+    ("find_page", ("projects", {}, None, None, 3), {}),
+    ("find_page", ("projects", {}, ("title", "order", "id"), (3, "3"), 4), {}),
+    ("find_page", ("photography", {}, None, (2, "2"), 10), {}),
+]
+
+
+@pytest.mark.parametrize("method, args, kwargs", READS)
+def test_backends_return_the_same_documents(backends, method, args, kwargs):
+    mongo, memory = backends
+    expected = run(getattr(mongo, method)(*args, **kwargs))
+    actual = run(getattr(memory, method)(*args, **kwargs))
+    # Compared as encoded JSON, so field order counts too
+    assert encode_json(actual) == encode_json(expected)
+
+
+def test_summary_projection_drops_excluded_fields(backends):
+    for storage in backends:
+        works = run(storage.find("creative_works", fields=("title", "fullContent"), exclude=("fullContent",)))
+        assert works and all(set(work) == {"title"} for work in works)
+
+
+def test_iterate_walks_keyset_order(backends):
+    async def collect(storage):
+        return [document["id"] async for document in storage.iterate("projects", {}, ("id",), None, batch_size=2)]
+
+    mongo, memory = backends
+    assert run(collect(memory)) == run(collect(mongo))
+
+
+def test_memory_storage_needs_no_database():
+    storage = memory_storage()
+    assert run(storage.find_one("profile", {}, ("name",))) == {"name": portfolio_data["profile"]["name"]}
+    assert len(run(storage.find("projects"))) == len(portfolio_data["projects"])
+    assert storage.stats()["rows"]["projects"] == len(portfolio_data["projects"])
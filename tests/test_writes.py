@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from writes import DELETE, REPLACE, UPDATE, QueueFull, Write, WriteQueue
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def project(item_id, **fields):
+    return Write("projects", {"id": item_id}, REPLACE, {"id": item_id, "title": "Old", "order": 1, **fields})
+
+
+def test_merge_update_into_replace_keeps_the_replace():
+    merged = project("1").merge(Write("projects", {"id": "1"}, UPDATE, {"title": "New"}))
+    assert merged.kind == REPLACE
+    assert merged.document == {"id": "1", "title": "New", "order": 1}
+
+
+def test_merge_updates_combine_fields():
+    first = Write("projects", {"id": "1"}, UPDATE, {"title": "New", "order": 2})
+    merged = first.merge(Write("projects", {"id": "1"}, UPDATE, {"order": 3}))
+    assert merged.kind == UPDATE
+    assert merged.document == {"title": "New", "order": 3}
+
+
+def test_merge_later_replace_or_delete_wins():
+    update = Write("projects", {"id": "1"}, UPDATE, {"title": "New"})
+    delete = Write("projects", {"id": "1"}, DELETE)
+    assert update.merge(delete) is delete
+    replace = project("1")
+    assert delete.merge(replace) is replace
+
+
+def test_merge_update_after_delete_stays_deleted():
+    delete = Write("projects", {"id": "1"}, DELETE)
+    assert delete.merge(Write("projects", {"id": "1"}, UPDATE, {"title": "New"})) is delete
+
+
+class Recorder:
+    def __init__(self):
+        self.commits = []
+        self.written = []
+
+    async def on_commit(self, *collections):
+        self.commits.append(collections)
+
+    def on_written(self, writes):
+        self.written.extend(writes)
+
+
+def queue(**options):
+    recorder = Recorder()
+    database = AsyncMongoMockClient()["portfolio_test"]
+    return WriteQueue(database, recorder.on_commit, on_written=recorder.on_written, **options), database, recorder
+
+
+def test_pending_writes_to_one_document_coalesce():
+    write_queue, database, recorder = queue()
+
+    async def scenario():
+        jobs = [
+            write_queue.submit(project("1")),
+            write_queue.submit(Write("projects", {"id": "1"}, UPDATE, {"title": "Newer"})),
+            write_queue.submit(project("2")),
+        ]
+        await write_queue.flush_batch()
+        return jobs, await database.projects.find({}, {"_id": 0}).sort("id").to_list(None)
+
+    jobs, documents = run(scenario())
+    assert [job.status for job in jobs] == ["done"] * 3
+    assert [document["title"] for document in documents] == ["Newer", "Old"]
+    assert write_queue.stats()["coalesced"] == 1
+    assert write_queue.stats()["flushed"] == 2
+    assert write_queue.stats()["batches"] == 1
+    assert recorder.commits == [("projects",)]
+    assert len(recorder.written) == 2
+
+
+def test_update_of_missing_document_fails_its_job():
+    write_queue, _, recorder = queue()
+
+    async def scenario():
+        job = write_queue.submit(Write("projects", {"id": "missing"}, UPDATE, {"title": "New"}))
+        await write_queue.flush_batch()
+        return job
+
+    job = run(scenario())
+    assert job.status == "failed"
+    assert job.error == "Document not found"
+    assert recorder.written == []
+
+
+def test_full_queue_rejects_new_documents_but_coalesces_pending_ones():
+    write_queue, _, _ = queue(max_pending=1)
+
+    async def scenario():
+        write_queue.submit(project("1"))
+        write_queue.submit(Write("projects", {"id": "1"}, UPDATE, {"title": "New"}))
+        with pytest.raises(QueueFull):
+            write_queue.submit(project("2"))
+
+    run(scenario())
+    assert len(write_queue) == 1